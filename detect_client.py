@@ -0,0 +1,81 @@
+"""
+检测服务的轻量客户端：只读取摄像头、转发画面并把决策发给 Arduino，
+不导入 torch/ultralytics，也不加载模型，开机或崩溃重启后几乎立即开始工作。
+
+    python detector_daemon.py --model models/trashcan.pt &
+    python detect_client.py --source 0 --port /dev/ttyUSB0
+"""
+import argparse
+
+from engine.serial_link import PROTOCOLS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检测服务客户端")
+    parser.add_argument("--socket", default="/tmp/trash_detector.sock",
+                        help="检测服务的 Unix socket 路径或 host:port")
+    parser.add_argument("--source", default="0", help="摄像头编号、视频文件或图片文件夹")
+    parser.add_argument("--stream", default="default", help="流名，每个垃圾桶一个")
+    parser.add_argument("--encoding", default="raw", choices=("raw", "jpeg"),
+                        help="raw 发送原始像素（本机），jpeg 压缩后发送（跨机器）")
+    parser.add_argument("--port", help="Arduino 串口，不给则只打印决策")
+    parser.add_argument("--baud", type=int, default=9600, help="波特率")
+    parser.add_argument("--protocol", default="legacy", choices=PROTOCOLS, help="串口协议")
+    parser.add_argument("--show", action="store_true", help="显示检测画面")
+    parser.add_argument("--display-fps", type=float, default=15.0, help="显示窗口的最高刷新率")
+    args = parser.parse_args()
+
+    # 只导入客户端需要的模块，推理后端留在守护进程里
+    from engine.core import FrameResult
+    from engine.config import load_class_names
+    from engine.daemon import DaemonClient
+    from engine.postprocess import ClassTable, Detections
+    from engine.preprocess import Preprocessor
+    from engine.sinks import DisplaySink, PrintSink, SerialSink
+    from engine.sources import open_source
+    from engine.timing import process_uptime
+
+    client = DaemonClient(args.socket, stream=args.stream, encoding=args.encoding)
+    info = client.ping()
+    client.reset()
+    print(f"已连接检测服务 {args.socket}（模型 {info['model']}，已运行 {info['uptime_s']:.0f}s）")
+
+    sinks = [SerialSink(args.port, args.baud, protocol=args.protocol) if args.port else PrintSink()]
+    if args.show:
+        sinks.append(DisplaySink(max_fps=args.display_fps))
+    # 显示时在本地做同样的裁切缩放，框的坐标才能对上
+    preprocessor = Preprocessor(info["crop"], info["imgsz"], roi=info.get("roi")) if args.show else None
+    table = ClassTable(load_class_names())
+
+    source = open_source(args.source, realtime=True)
+    first_frame = first_decision = None
+    try:
+        for frame in source:
+            raw, decisions, _ = client.detect(frame)
+            if first_frame is None:
+                first_frame = process_uptime()
+                print(f"启动到首帧结果: {first_frame:.2f}s")
+            for decision in decisions:
+                if first_decision is None:
+                    first_decision = process_uptime()
+                    print(f"启动到首个决策: {first_decision:.2f}s")
+                print(f" {decision.label}, {decision.trash_type}")
+                for sink in sinks:
+                    sink.on_decision(decision)
+            if preprocessor is not None:
+                result = FrameResult(preprocessor(frame), Detections.from_raw(raw, table, 0.0), decisions, raw=raw)
+                for sink in sinks:
+                    sink.on_frame(result)
+            if any(sink.quit for sink in sinks):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.release()
+        client.close()
+        for sink in sinks:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
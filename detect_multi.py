@@ -0,0 +1,38 @@
+from engine import PrintSink, SerialSink, load_backend
+from engine.cli import build_engine, build_parser
+from engine.multi import BinStream, MultiStreamService
+
+
+def main():
+    parser = build_parser("一个进程服务多个垃圾桶，多路摄像头合并批量推理", source=None, conf=0.7)
+    parser.add_argument("--sources", nargs="+", required=True,
+                        help="每个垃圾桶的摄像头编号或视频文件")
+    parser.add_argument("--ports", nargs="*", default=[],
+                        help="每个垃圾桶的 Arduino 串口，与 --sources 一一对应，不给则只打印")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--batch-wait", type=float, default=10.0,
+                        help="拿到一路的帧后最多等其它路多少毫秒再一起推理，0 表示不等")
+    args = parser.parse_args()
+
+    if args.ports and len(args.ports) != len(args.sources):
+        parser.error("--ports 的数量必须与 --sources 相同")
+    # 各路合并成一次 predict_batch，不经过单路引擎的关键帧跟踪、级联和远程推理
+    for flag, used in (("--keyframe", args.keyframe > 1), ("--cascade", args.cascade), ("--remote", args.remote)):
+        if used:
+            parser.error(f"多路批量推理不支持 {flag}")
+
+    # 所有垃圾桶共享同一份模型
+    backend = load_backend(args.model, args.backend)
+    streams = []
+    for i, source in enumerate(args.sources):
+        sinks = [SerialSink(args.ports[i], args.baud)] if args.ports else [PrintSink()]
+        engine = build_engine(args, sinks=sinks, backend=backend, source=source,
+                              realtime=not str(source).isdigit())
+        streams.append(BinStream(f"bin{i}", engine))
+
+    MultiStreamService(backend, streams, conf=args.conf, stats_interval=args.stats_interval or 2.0,
+                       batch_wait=args.batch_wait / 1000).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,38 @@
-import cv2
-from ultralytics import YOLO
-
-# 加载模型
-model = YOLO(r"models\trashcan.pt", verbose=False) 
-
-# 定义发送到Arduino的函数
-def send_to_arduino(cls_id):
-    print(f"Sending to Arduino: {cls_id}")
-
-video_path = "test.mp4"
-# 打开视频捕捉
-video_cap = cv2.VideoCapture(1)
-
-# 定义视频写入器
-output_path = "output.mp4"
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_path, fourcc, 30.0, (320, 320))
-
-# 初始化变量
-last_cls_id = None
-frame_count = 0
-threshold = 5  # 连续帧数阈值
-
-while video_cap.isOpened():
-    success, frame = video_cap.read()
-    if not success:
-        break
-
-    # 裁切画面到480x480
-    frame = frame[:, 80:560]
-
-    # 调整尺寸为320x320
-    frame = cv2.resize(frame, (320, 320))
-
-    # 设置置信度
-    conf = 0.7
-    # 进行YOLO预测
-    results = model.predict(frame, conf=conf, verbose=False)
-    
-    for result in results:
-        # 绘制结果
-        frame = result.plot()
-        # 取出结果的类别、置信度、坐标
-        boxes = result.boxes
-        for box in boxes:
-            cls_id = int(box.cls.item())
-            score = box.conf.item()
-            label = model.names[cls_id]
-
-            # 检测相同的cls_id
-            if cls_id == last_cls_id:
-                frame_count += 1
-            else:
-                last_cls_id = cls_id
-                frame_count = 1
-            # 如果连续帧数超过阈值, 发送到Arduino
-            if frame_count >= threshold:
-                send_to_arduino(cls_id)
-                frame_count = 0  # 重置计数器
-
-    # 写入帧到输出视频
-    # out.write(frame)
-
-    cv2.imshow('Detection', frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-# 释放资源
-video_cap.release()
-# out.release()  # 释放视频写入器
-cv2.destroyAllWindows()
\ No newline at end of file
+from engine import DisplaySink, EventClipRecorder, PrintSink, RecorderSink
+from engine.cli import build_engine, build_parser
+
+
+def main():
+    parser = build_parser("检测并录制视频", source="1", conf=0.7)
+    parser.add_argument("--mode", default="clips", choices=("clips", "full"),
+                        help="clips 只保存分拣决策和低置信度事件前后的短片段，full 连续录制")
+    parser.add_argument("--output", default="output.mp4", help="full 模式的输出视频路径")
+    parser.add_argument("--clip-dir", default="clips", help="clips 模式的片段目录")
+    parser.add_argument("--fps", type=float, default=30.0, help="输出视频帧率")
+    parser.add_argument("--pre-roll", type=float, default=2.0, help="事件前保留的秒数")
+    parser.add_argument("--post-roll", type=float, default=2.0, help="事件后继续录制的秒数")
+    parser.add_argument("--low-conf", type=float, default=0.8,
+                        help="最高分低于该值的检测也算事件，0 表示只录分拣决策")
+    parser.add_argument("--rotate-seconds", type=float, default=300.0,
+                        help="full 模式每个文件的最长秒数")
+    parser.add_argument("--rotate-mb", type=float, default=200.0, help="full 模式每个文件的最大 MB")
+    parser.add_argument("--max-total-mb", type=float, default=1000.0,
+                        help="录像总大小上限，超过后删除最旧的文件")
+    args = parser.parse_args()
+
+    if args.mode == "clips":
+        recorder = EventClipRecorder(args.clip_dir, fps=args.fps, pre_roll=args.pre_roll,
+                                     post_roll=args.post_roll, low_conf=args.low_conf,
+                                     max_total_mb=args.max_total_mb)
+    else:
+        recorder = RecorderSink(args.output, fps=args.fps, max_seconds=args.rotate_seconds,
+                                max_mb=args.rotate_mb, max_total_mb=args.max_total_mb)
+    sinks = [PrintSink(), recorder]
+    if not args.headless:
+        sinks.append(DisplaySink(max_fps=args.display_fps))
+    engine = build_engine(args, sinks=sinks)
+    engine.run()
+
+
+if __name__ == "__main__":
+    main()
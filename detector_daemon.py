@@ -0,0 +1,50 @@
+import time
+
+from engine import load_backend
+from engine.cli import build_decider, build_gates, build_parser, build_roi
+from engine.daemon import DetectorDaemon
+from engine.hotswap import ModelReloader
+from engine.ipc import DEFAULT_SOCKET
+
+# build_parser 里只对本地检测循环有效的选项，检测服务不使用
+UNSUPPORTED = (
+    "stats_interval", "headless", "display_fps", "keyframe", "track_min_conf",
+    "cascade", "cascade_below", "cascade_margin", "cascade_conf",
+    "cam_format", "cam_size", "cam_fps", "cam_buffer", "exposure", "white_balance",
+    "remote", "remote_timeout", "remote_inflight",
+    "harvest", "harvest_low_conf", "harvest_interval", "harvest_quota_mb",
+    "metrics_port", "metrics_file", "metrics_interval",
+)
+
+
+def main():
+    parser = build_parser("常驻检测服务：模型只加载一次，detect_client.py 通过 socket 发送画面",
+                          source=None, conf=0.7)
+    parser.add_argument("--socket", default=DEFAULT_SOCKET,
+                        help="Unix socket 路径，或 host:port 在 TCP 上服务")
+    parser.add_argument("--warmup", type=int, default=3, help="启动时空跑推理的次数")
+    args = parser.parse_args()
+    for dest in UNSUPPORTED:
+        if getattr(args, dest) != parser.get_default(dest):
+            parser.error(f"检测服务不支持 --{dest.replace('_', '-')}")
+
+    t0 = time.perf_counter()
+    backend = load_backend(args.model, args.backend)
+    load_time = time.perf_counter() - t0
+    # reload 命令总是可用，--hot-reload 时还会监视模型文件
+    roi = build_roi(args)
+    reloader = ModelReloader(backend, args.model, args.backend, imgsz=args.imgsz or None,
+                             crop=args.crop, watch=args.hot_reload, poll=args.reload_poll,
+                             roi=roi).start()
+    reloader.install_signal()
+    daemon = DetectorDaemon(backend, load_time=load_time, gate_factory=lambda: build_gates(args),
+                            decider_factory=lambda: build_decider(args), reloader=reloader,
+                            conf=args.conf, threshold=args.threshold, crop=args.crop,
+                            imgsz=args.imgsz or None, roi=roi)
+    warmup_time = daemon.warmup(args.warmup)
+    print(f"模型加载 {load_time:.2f}s, 预热 {warmup_time:.2f}s")
+    daemon.serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+共享检测引擎，detect_pc.py / detect_pi.py / detect_record.py 都基于它运行。
+
+    from engine import DetectionEngine, load_backend, open_source, DisplaySink
+
+    engine = DetectionEngine(load_backend("models/trashcan.pt"), open_source(0),
+                             sinks=[DisplaySink()], conf=0.7)
+    engine.run()
+"""
+from .backends import OnnxBackend, PlaceholderBackend, UltralyticsBackend, load_backend
+from .capture import CameraMode, CaptureConfig, list_modes, measure, open_capture, pick_mode
+from .cascade import Cascade
+from .config import (DEFAULT_MODEL, TRASH_CATEGORIES, TRASH_CATEGORY_IDS,
+                     classify_trash, load_class_names)
+from .core import DetectionEngine, FrameResult
+from .daemon import DaemonClient, DetectorDaemon
+from .decide import Debouncer, Decision
+from .gating import MotionGate, QualityGate
+from .postprocess import ClassTable, Detection, Detections
+from .harvest import HardExampleHarvester
+from .hotswap import ModelReloader
+from .keyframe import FlowBoxTracker, KeyframeScheduler
+from .metrics import Metrics
+from .preprocess import Preprocessor
+from .procpool import ProcessPoolPipeline, SharedFrameRing
+from .recorder import BackgroundEncoder, EventClipRecorder, RecorderSink
+from .sequential import SequentialDecider
+from .sinks import DisplaySink, PrintSink, SerialSink, Sink
+from .sources import (CameraSource, FrameSource, ImageFolderSource, ReplaySource,
+                      VideoFileSource, open_source)
+from .threaded import ThreadedPipeline
+from .tracks import IouTracker, Track, TrackDecider
+from .timing import FpsCounter, StageTimer, process_uptime
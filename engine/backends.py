@@ -0,0 +1,191 @@
+import ast
+from pathlib import Path
+
+import numpy as np
+
+from .config import load_class_names
+from .ops import letterbox, scale_boxes, to_blob, yolo_postprocess
+
+BACKENDS = ("auto", "ultralytics", "onnx", "int8")
+
+
+class UltralyticsBackend:
+    """直接用 ultralytics.YOLO 推理，ultralytics/torch 在构造时才导入"""
+
+    def __init__(self, model_path, verbose=False, threads=0):
+        from ultralytics import YOLO
+
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        self.model_path = str(model_path)
+        self.model = YOLO(self.model_path, verbose=verbose)
+        self.names = self.model.names
+
+    def predict(self, frame, conf):
+        """
+        Returns:
+            boxes (N, 4) xyxy float32, scores (N,) float32, classes (N,) int64
+        """
+        result = self.model.predict(frame, conf=conf, verbose=False)[0]
+        return self._to_arrays(result)
+
+    @staticmethod
+    def _to_arrays(result):
+        data = result.boxes.data.cpu().numpy()
+        return data[:, :4], data[:, 4], data[:, 5].astype(np.int64)
+
+    def predict_batch(self, frames, conf):
+        """一次 predict 调用处理多帧，返回与 frames 一一对应的结果列表"""
+        results = self.model.predict(list(frames), conf=conf, verbose=False)
+        return [self._to_arrays(result) for result in results]
+
+    @staticmethod
+    def supports_blob(size):
+        # 张量输入不会再 letterbox，边长必须是 stride 的整数倍
+        return size % 32 == 0
+
+    def predict_blob(self, blob, conf):
+        """
+        直接推理预处理好的 NCHW float32 RGB blob（见 engine.preprocess），
+        torch.from_numpy 与 blob 共享内存，跳过 ultralytics 自己的 letterbox 和归一化。
+        坐标在 blob 尺度上。
+        """
+        import torch
+
+        result = self.model.predict(torch.from_numpy(blob), conf=conf, verbose=False)[0]
+        return self._to_arrays(result)
+
+    def predict_blob_batch(self, blob, conf):
+        """predict_blob 的批量版本，blob 为 (N, 3, H, W)，返回 N 个结果"""
+        import torch
+
+        results = self.model.predict(torch.from_numpy(blob), conf=conf, verbose=False)
+        return [self._to_arrays(result) for result in results]
+
+
+class OnnxBackend:
+    """
+    用 onnxruntime 在 CPU 上运行导出的 ONNX 模型，自己做 letterbox 和 NMS，
+    不需要导入 torch。输出与 UltralyticsBackend 相同。
+    """
+
+    def __init__(self, model_path, iou=0.7, max_det=300, threads=0):
+        import onnxruntime as ort
+
+        self.model_path = str(model_path)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, options,
+                                            providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.input_shape = tuple(model_input.shape[2:4])
+        if not all(isinstance(d, int) for d in self.input_shape):
+            # dynamic 导出时宽高也是可变的，按导出时记录的 imgsz 推理
+            self.input_shape = tuple(ast.literal_eval(meta.get("imgsz", "[320, 320]")))
+        # 导出时 dynamic=True 则 batch 维是字符串，否则是固定的整数
+        batch = model_input.shape[0]
+        self.batch_size = batch if isinstance(batch, int) else 0
+        self.iou = iou
+        self.max_det = max_det
+        self.names = self._read_names()
+
+    def _read_names(self):
+        # ultralytics 导出时把类别名写在 metadata 里，形如 "{0: 'bottle', ...}"
+        meta = self.session.get_modelmeta().custom_metadata_map
+        if "names" in meta:
+            return ast.literal_eval(meta["names"])
+        return dict(enumerate(load_class_names()))
+
+    def predict(self, frame, conf):
+        img, ratio, pad = letterbox(frame, self.input_shape)
+        output = self.session.run(None, {self.input_name: to_blob(img)})[0]
+        boxes, scores, classes = yolo_postprocess(output, conf, self.iou, self.max_det)
+        return scale_boxes(boxes, ratio, pad, frame.shape), scores, classes
+
+    def supports_blob(self, size):
+        return self.input_shape == (size, size)
+
+    def predict_blob(self, blob, conf):
+        """直接推理预处理好的 NCHW float32 RGB blob（见 engine.preprocess），坐标在 blob 尺度上"""
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return yolo_postprocess(output, conf, self.iou, self.max_det)
+
+    def _run_batch(self, blob):
+        """按模型的 batch_size 分块推理（固定 batch 的最后一块补零），返回拼好的输出"""
+        chunk = self.batch_size or len(blob)
+        outputs = []
+        for start in range(0, len(blob), chunk):
+            part = blob[start:start + chunk]
+            if len(part) < chunk:
+                part = np.concatenate([part, np.zeros((chunk - len(part),) + part.shape[1:], part.dtype)])
+            outputs.append(self.session.run(None, {self.input_name: part})[0])
+        return np.concatenate(outputs)
+
+    def predict_batch(self, frames, conf):
+        """
+        多帧拼成一个 batch 推理。固定 batch 的模型按 batch_size 分块，最后一块补零；
+        batch_size 为 1 的模型退化为逐帧推理。
+        """
+        if self.batch_size == 1:
+            return [self.predict(frame, conf) for frame in frames]
+        letterboxed = [letterbox(frame, self.input_shape) for frame in frames]
+        output = self._run_batch(np.concatenate([to_blob(img) for img, _, _ in letterboxed]))
+        results = []
+        for i, (frame, (_, ratio, pad)) in enumerate(zip(frames, letterboxed)):
+            boxes, scores, classes = yolo_postprocess(output[i:i + 1], conf, self.iou, self.max_det)
+            results.append((scale_boxes(boxes, ratio, pad, frame.shape), scores, classes))
+        return results
+
+    def predict_blob_batch(self, blob, conf):
+        """predict_blob 的批量版本，blob 为 (N, 3, H, W)，返回 N 个结果，坐标在 blob 尺度上"""
+        output = self._run_batch(blob)
+        return [yolo_postprocess(output[i:i + 1], conf, self.iou, self.max_det) for i in range(len(blob))]
+
+
+class PlaceholderBackend:
+    """
+    不加载模型、只提供类别名的占位后端：多进程模式下推理全在 worker 里，
+    主进程只需要类别表，不必再多占一份模型内存（.pt 还要导入 torch）。
+
+    Args:
+        model_path: 模型路径，只用于显示
+        names: 类别名，None 表示使用 trash.names（worker 启动后由 ProcessPoolPipeline 换成模型里的类别名）
+    """
+
+    def __init__(self, model_path, names=None):
+        self.model_path = str(model_path)
+        self.names = names
+
+    def predict(self, frame, conf):
+        raise RuntimeError("占位后端没有加载模型，不能推理")
+
+
+def load_backend(model_path, backend="auto", threads=0):
+    """
+    根据模型路径创建推理后端
+
+    Args:
+        model_path: .pt 或 .onnx 模型路径
+        backend (str): auto 按后缀选择；onnx 时若给的是 .pt，使用同名 .onnx；
+            int8 使用 tools/quantize_int8.py 生成的 <模型名>_int8.onnx
+        threads (int): 推理线程数，0 表示由 torch/onnxruntime 决定（多进程时每个进程应设小一些）
+    """
+    path = Path(model_path)
+    if backend == "int8":
+        if not path.stem.endswith("_int8"):
+            path = path.with_name(path.stem + "_int8.onnx")
+        return OnnxBackend(path.with_suffix(".onnx"), threads=threads)
+    if backend == "auto":
+        backend = "onnx" if path.suffix == ".onnx" else "ultralytics"
+    if backend == "onnx":
+        if path.suffix != ".onnx":
+            path = path.with_suffix(".onnx")
+        return OnnxBackend(path, threads=threads)
+    if backend == "ultralytics":
+        return UltralyticsBackend(path, threads=threads)
+    raise ValueError(f"未知的推理后端: {backend}，可选 {BACKENDS}")
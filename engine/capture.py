@@ -0,0 +1,232 @@
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+
+FORMATS = ("MJPG", "YUYV")
+
+# v4l2-ctl 不可用时逐个尝试的常见分辨率
+COMMON_SIZES = [(320, 240), (352, 288), (424, 240), (640, 360), (640, 480),
+                (800, 600), (1280, 720), (1920, 1080)]
+
+
+@dataclass
+class CameraMode:
+    """摄像头的一种原生输出模式"""
+    fourcc: str
+    width: int
+    height: int
+    fps: float = 0.0
+
+    def __str__(self):
+        fps = f"@{self.fps:g}" if self.fps else ""
+        return f"{self.fourcc} {self.width}x{self.height}{fps}"
+
+
+@dataclass
+class CaptureConfig:
+    """
+    摄像头采集参数，None 表示保持驱动默认值
+
+    Args:
+        fourcc (str): MJPG 或 YUYV
+        width, height (int): 分辨率
+        fps (float): 帧率
+        buffer_size (int): 驱动缓冲的帧数，1 表示只保留最新一帧，减少延迟
+        exposure (float): 固定曝光值（V4L2 下单位为 100us），None 表示自动曝光
+        white_balance (int): 固定白平衡色温（K），None 表示自动白平衡
+    """
+    fourcc: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    buffer_size: Optional[int] = 1
+    exposure: Optional[float] = None
+    white_balance: Optional[int] = None
+
+    @classmethod
+    def for_mode(cls, mode, **kwargs):
+        return cls(fourcc=mode.fourcc, width=mode.width, height=mode.height,
+                   fps=mode.fps or None, **kwargs)
+
+
+def _fourcc_str(value):
+    value = int(value)
+    return "".join(chr((value >> 8 * i) & 0xFF) for i in range(4)).strip("\x00")
+
+
+def open_capture(index, config=None):
+    """
+    打开摄像头并应用 config，返回 cv2.VideoCapture。
+    Linux 上使用 V4L2 后端，FOURCC 必须在分辨率之前设置，否则部分驱动会忽略。
+    """
+    api = cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY
+    cap = cv2.VideoCapture(index, api)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开摄像头: {index}")
+    if config is not None:
+        apply_config(cap, config)
+    return cap
+
+
+def apply_config(cap, config):
+    """设置采集参数，驱动不接受的参数打印警告"""
+    if config.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc))
+    if config.width and config.height:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+    if config.fps:
+        cap.set(cv2.CAP_PROP_FPS, config.fps)
+    if config.buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffer_size)
+    if config.exposure is not None:
+        # V4L2 的手动曝光是 1，部分旧版 OpenCV 用 0.25 表示手动
+        if not cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1):
+            cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25)
+        cap.set(cv2.CAP_PROP_EXPOSURE, config.exposure)
+    if config.white_balance is not None:
+        cap.set(cv2.CAP_PROP_AUTO_WB, 0)
+        cap.set(cv2.CAP_PROP_WB_TEMPERATURE, config.white_balance)
+
+    actual = current_mode(cap)
+    if config.fourcc and actual.fourcc != config.fourcc:
+        print(f"警告: 摄像头不支持 {config.fourcc}，实际格式 {actual.fourcc}")
+    if config.width and (actual.width, actual.height) != (config.width, config.height):
+        print(f"警告: 摄像头不支持 {config.width}x{config.height}，"
+              f"实际分辨率 {actual.width}x{actual.height}")
+    return actual
+
+
+def current_mode(cap):
+    return CameraMode(_fourcc_str(cap.get(cv2.CAP_PROP_FOURCC)),
+                      int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                      int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                      cap.get(cv2.CAP_PROP_FPS) or 0.0)
+
+
+def list_modes(index):
+    """
+    列出摄像头的原生模式。优先解析 v4l2-ctl --list-formats-ext，
+    没有 v4l2-ctl（或不是 Linux）时逐个尝试常见分辨率，读回驱动实际接受的值。
+    """
+    modes = _list_modes_v4l2(index)
+    if modes:
+        return modes
+    modes = []
+    cap = open_capture(index)
+    try:
+        for fourcc in FORMATS:
+            for width, height in COMMON_SIZES:
+                mode = _try_mode(cap, fourcc, width, height)
+                if mode is not None and mode not in modes:
+                    modes.append(mode)
+    finally:
+        cap.release()
+    return modes
+
+
+def _try_mode(cap, fourcc, width, height):
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    mode = current_mode(cap)
+    if (mode.fourcc, mode.width, mode.height) != (fourcc, width, height):
+        return None
+    return mode
+
+
+def _list_modes_v4l2(index):
+    device = index if isinstance(index, str) else f"/dev/video{index}"
+    try:
+        output = subprocess.run(["v4l2-ctl", "-d", device, "--list-formats-ext"],
+                                capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    modes = []
+    fourcc = size = None
+    for line in output.splitlines():
+        match = re.search(r"'(\w{4})'", line)
+        if match:
+            fourcc, size = match.group(1), None
+            continue
+        match = re.search(r"Size: \w+ (\d+)x(\d+)", line)
+        if match:
+            size = int(match.group(1)), int(match.group(2))
+            modes.append(CameraMode(fourcc, *size))
+            continue
+        match = re.search(r"\(([\d.]+) fps\)", line)
+        if match and size is not None:
+            fps = float(match.group(1))
+            # 同一分辨率只保留最高帧率
+            if fps > modes[-1].fps:
+                modes[-1].fps = fps
+    return [mode for mode in modes if mode.fourcc in FORMATS]
+
+
+def pick_mode(modes, side, fourcc=None, min_fps=0.0):
+    """
+    选择能覆盖中心正方形裁切的最小原生模式：短边不小于 side（推理边长），
+    像素最少，面积相同时帧率高的优先。裁切后的画面只缩小不放大，
+    也不再解码之后会被丢掉的像素。
+
+    Args:
+        modes: list_modes() 的结果
+        side (int): 推理边长，如 320
+        fourcc (str): 只考虑该格式，None 时优先 MJPG（USB 带宽小，高帧率）
+        min_fps (float): 最低帧率，0 表示不限制
+    """
+    candidates = [m for m in modes if min(m.width, m.height) >= side
+                  and (not fourcc or m.fourcc == fourcc)
+                  and (not min_fps or not m.fps or m.fps >= min_fps)]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda m: (m.width * m.height, m.fourcc != "MJPG", -m.fps))
+
+
+def measure(cap, frames=60, idle=0.5):
+    """
+    测量当前模式的实际采集性能
+
+    Returns:
+        dict: fps 实际帧率；read_ms 每次 read 的平均耗时；decode_ms 一帧的解码时间；
+            buffered 空闲 idle 秒后立即返回的旧帧数（驱动缓冲）；
+            latency_ms 估计的画面延迟 = (缓冲帧数 + 1) 帧间隔 + 解码时间
+    """
+    for _ in range(5):
+        cap.read()
+    t0 = time.perf_counter()
+    reads = 0
+    for _ in range(frames):
+        if cap.read()[0]:
+            reads += 1
+    elapsed = time.perf_counter() - t0
+    fps = reads / elapsed if elapsed else 0.0
+
+    # 解码时间：grab 只取出原始数据，retrieve 做解码和颜色转换
+    cap.grab()
+    t0 = time.perf_counter()
+    cap.retrieve()
+    decode = time.perf_counter() - t0
+
+    # 空闲一段时间后，缓冲里的旧帧会立刻返回，直到需要等待新帧
+    time.sleep(idle)
+    interval = 1.0 / fps if fps else 0.0
+    buffered = 0
+    for _ in range(16):
+        t = time.perf_counter()
+        cap.grab()
+        if time.perf_counter() - t > interval / 2:
+            break
+        buffered += 1
+    return {
+        "fps": fps,
+        "read_ms": elapsed / max(reads, 1) * 1000,
+        "decode_ms": decode * 1000,
+        "buffered": buffered,
+        "latency_ms": ((buffered + 1) * interval + decode) * 1000,
+    }
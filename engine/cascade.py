@@ -0,0 +1,144 @@
+import numpy as np
+
+from .ops import box_iou
+
+# 经常互相认错的类别对（见 tools/quantize_int8.py 的混淆统计）
+CONFUSABLE_PAIRS = (("china", "radish"), ("china", "stone"), ("radish", "stone"))
+
+
+class Cascade:
+    """
+    置信度驱动的级联：快速模型（320）每帧都跑，只有结果模棱两可时，
+    才在候选框周围从原始分辨率画面裁一块送给精确模型（640）重新判断。
+
+    满足任一条件就升级：
+        - 最高分低于 escalate_below
+        - 与它重叠（IoU > overlap）的另一类别框分差小于 margin
+        - 最高类别与重叠框的类别是已知的易混淆对（如 china / radish）
+
+    Args:
+        backend: 精确模型后端，如 load_backend("models/trashcan_640.pt")
+        names: 类别名列表，用于匹配易混淆对
+        escalate_below (float): 最高分低于该值时升级
+        margin (float): 两个重叠的不同类别框分差小于该值时升级
+        candidate_conf (float): 快速模型给出候选框的最低分，应低于最终的 conf
+        confusable: 易混淆的类别名对
+        overlap (float): 判定两个框属于同一物体的 IoU
+        crop_scale (float): 裁切区域相对候选框的放大倍数，给精确模型留上下文
+        min_crop (int): 裁切区域的最小边长（原始分辨率像素）
+        max_escalations (int): 每帧最多升级的物体数，限制最坏情况的耗时
+    """
+
+    def __init__(self, backend, names, escalate_below=0.85, margin=0.2, candidate_conf=0.4,
+                 confusable=CONFUSABLE_PAIRS, overlap=0.5, crop_scale=1.5, min_crop=96,
+                 max_escalations=1):
+        self.backend = backend
+        self.escalate_below = escalate_below
+        self.margin = margin
+        self.candidate_conf = candidate_conf
+        self.overlap = overlap
+        self.crop_scale = crop_scale
+        self.min_crop = min_crop
+        self.max_escalations = max_escalations
+        self.confusable_names = tuple(confusable)
+        self.set_names(names)
+        self.frames = 0
+        self.escalated = 0
+        self.reasons = {"low": 0, "margin": 0, "confusable": 0}
+
+    def set_names(self, names):
+        """按快速模型的类别名重建易混淆类别号，热更新换了模型（类别顺序可能变化）时调用"""
+        index = {name: i for i, name in enumerate(names)}
+        self.confusable = {frozenset((index[a], index[b])) for a, b in self.confusable_names
+                           if a in index and b in index}
+
+    @property
+    def escalation_rate(self):
+        return self.escalated / self.frames if self.frames else 0.0
+
+    def _reason(self, i, boxes, scores, classes):
+        """第 i 个框是否需要升级，返回原因或 None"""
+        if scores[i] < self.escalate_below:
+            return "low"
+        others = np.flatnonzero(classes != classes[i])
+        if not len(others):
+            return None
+        ious = box_iou(boxes[i], boxes[others])
+        rivals = others[ious > self.overlap]
+        if not len(rivals):
+            return None
+        rival = rivals[scores[rivals].argmax()]
+        if scores[i] - scores[rival] < self.margin:
+            return "margin"
+        if frozenset((int(classes[i]), int(classes[rival]))) in self.confusable:
+            return "confusable"
+        return None
+
+    def refine(self, raw, source, image_shape):
+        """
+        Args:
+            raw: 快速模型的 (boxes, scores, classes)，坐标在预处理后的图像上
+            source: 预处理缩放前的画面（中心裁切后的原始分辨率）
+            image_shape: 预处理后图像的形状，用来把坐标换算到 source 上
+
+        Returns:
+            替换了升级区域之后的 (boxes, scores, classes)
+        """
+        self.frames += 1
+        boxes, scores, classes = raw
+        if not len(scores):
+            return raw
+        scale = np.array([source.shape[1] / image_shape[1], source.shape[0] / image_shape[0]] * 2,
+                         dtype=np.float32)
+        keep = np.ones(len(scores), dtype=bool)
+        extra = []
+        escalations = 0
+        for i in scores.argsort()[::-1]:
+            if escalations >= self.max_escalations:
+                break
+            if not keep[i]:
+                continue
+            reason = self._reason(i, boxes, scores, classes)
+            if reason is None:
+                continue
+            escalations += 1
+            self.reasons[reason] += 1
+            (x0, y0, side), (crop_boxes, crop_scores, crop_classes) = \
+                self._predict_crop(boxes[i], source, scale)
+            # 中心落在裁切区域里的快速模型结果都由精确模型的结果代替
+            region = np.array([x0, y0, x0 + side, y0 + side], dtype=np.float32) / scale
+            centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+            keep &= ~((centers >= region[:2]) & (centers <= region[2:])).all(axis=1)
+            if len(crop_scores):
+                mapped = (crop_boxes + np.array([x0, y0, x0, y0], dtype=np.float32)) / scale
+                extra.append((mapped.astype(np.float32), crop_scores, crop_classes))
+        if escalations:
+            self.escalated += 1
+        if not extra and keep.all():
+            return raw
+        parts = [(boxes[keep], scores[keep], classes[keep])] + extra
+        return (np.concatenate([p[0] for p in parts]).reshape(-1, 4),
+                np.concatenate([p[1] for p in parts]),
+                np.concatenate([p[2] for p in parts]))
+
+    def _predict_crop(self, box, source, scale):
+        """
+        以候选框为中心在原始分辨率画面上裁一个正方形，用精确模型检测
+
+        Returns:
+            (x0, y0, side) 裁切区域，(boxes, scores, classes) 坐标在裁切图上
+        """
+        h, w = source.shape[:2]
+        x1, y1, x2, y2 = box * scale
+        side = max(int(max(x2 - x1, y2 - y1) * self.crop_scale), self.min_crop)
+        side = min(side, w, h)
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        x0 = int(np.clip(cx - side / 2, 0, w - side))
+        y0 = int(np.clip(cy - side / 2, 0, h - side))
+        crop = source[y0:y0 + side, x0:x0 + side]
+        return (x0, y0, side), self.backend.predict(crop, self.candidate_conf)
+
+    def stats(self):
+        return (f"级联: 升级 {self.escalated}/{self.frames} 帧 ({self.escalation_rate:.1%}), "
+                f"低分 {self.reasons['low']}, 分差小 {self.reasons['margin']}, "
+                f"易混淆 {self.reasons['confusable']}")
@@ -0,0 +1,255 @@
+import argparse
+import os
+
+from .backends import BACKENDS, load_backend
+from .capture import FORMATS, CaptureConfig, list_modes, pick_mode
+from .cascade import Cascade
+from .config import DEFAULT_MODEL
+from .core import DetectionEngine
+from .decide import Debouncer
+from .gating import MotionGate, QualityGate
+from .harvest import HardExampleHarvester
+from .hotswap import ModelReloader
+from .keyframe import KeyframeScheduler
+from .metrics import Metrics
+from .remote import RemoteBackend
+from .roi import load_priors, prior_roi
+from .sequential import SequentialDecider
+from .sources import FrameSource, is_camera, open_source
+from .tracks import TrackDecider
+
+
+def build_parser(description, source="0", conf=0.7, crop=True, imgsz=320):
+    """
+    三个 detect 脚本共用的命令行参数，默认值由各脚本传入
+
+    Args:
+        description (str): 脚本说明
+        source: 默认帧来源，None 表示不添加 --source（由脚本自己定义输入）
+        conf (float): 默认置信度阈值
+        crop (bool): 默认是否裁切中心正方形
+        imgsz (int): 默认缩放尺寸，0 表示不缩放
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="模型路径")
+    parser.add_argument("--backend", default="auto", choices=BACKENDS,
+                        help="推理后端，auto 按模型后缀选择（.onnx 使用 onnxruntime）")
+    if source is not None:
+        parser.add_argument("--source", default=source, help="摄像头编号、视频文件或图片文件夹")
+    parser.add_argument("--conf", type=float, default=conf, help="置信度阈值")
+    parser.add_argument("--threshold", type=int, default=5, help="同一类别出现多少帧才输出决策")
+    parser.add_argument("--decider", default="consecutive", choices=("consecutive", "track", "sprt"),
+                        help="consecutive 为全局连续计数；track 按物体跟踪投票；"
+                             "sprt 按物体累计置信度证据、足够确定就提前决策（至少 2 帧）")
+    parser.add_argument("--decision-error", type=float, default=0.01,
+                        help="sprt 允许的误判概率，越小决策越保守")
+    parser.add_argument("--track-iou", type=float, default=0.3, help="检测框关联到同一物体的最小 IoU")
+    parser.add_argument("--track-misses", type=int, default=5, help="物体连续丢失多少帧后结束跟踪")
+    parser.add_argument("--imgsz", type=int, default=imgsz, help="推理前缩放的边长，0 表示不缩放")
+    parser.add_argument("--crop", dest="crop", action="store_true", default=crop,
+                        help="裁切画面中心的正方形")
+    parser.add_argument("--no-crop", dest="crop", action="store_false")
+    parser.add_argument("--roi-priors", metavar="CSV",
+                        help="按位置/尺寸先验（如 bbox_stats_1sigma.csv）只对物体常出现的区域推理，"
+                             "同样的输入尺寸下小物体分到更多像素")
+    parser.add_argument("--roi-classes", nargs="+", help="只按这些类别的先验求区域，默认全部")
+    parser.add_argument("--roi-margin", type=float, default=0.05, help="区域四周额外留出的比例")
+    parser.add_argument("--stats-interval", type=float, default=0.0,
+                        help="打印各阶段耗时的间隔（秒），0 表示不打印")
+    parser.add_argument("--headless", "--no-show", dest="headless", action="store_true",
+                        help="无头模式，不绘制也不调用任何 GUI 函数")
+    parser.add_argument("--display-fps", type=float, default=15.0,
+                        help="显示窗口的最高刷新率，与推理帧率无关")
+    parser.add_argument("--motion-gate", action="store_true",
+                        help="画面没有变化时跳过推理")
+    parser.add_argument("--motion-thresh", type=float, default=0.01,
+                        help="变化像素占比超过该值才推理")
+    parser.add_argument("--motion-hold", type=int, default=10,
+                        help="画面静止后继续推理的帧数")
+    parser.add_argument("--quality-gate", action="store_true",
+                        help="跳过运动模糊、过曝或欠曝的帧，不推理")
+    parser.add_argument("--blur-ratio", type=float, default=0.35,
+                        help="清晰度低于最近平均值的该倍数算模糊，0 表示不检查")
+    parser.add_argument("--clip-thresh", type=float, default=0.25,
+                        help="过亮或过暗像素占比超过该值算曝光不良，0 表示不检查")
+    parser.add_argument("--quality-max-skip", type=int, default=5,
+                        help="画质门控最多连续跳过的帧数，之后强制推理一帧")
+    parser.add_argument("--keyframe", type=int, default=0,
+                        help="每隔多少帧运行一次检测器，中间帧用光流跟踪，0 表示每帧检测")
+    parser.add_argument("--track-min-conf", type=float, default=0.5,
+                        help="跟踪置信度低于该值时立即重新检测")
+    parser.add_argument("--cascade", metavar="MODEL",
+                        help="级联模式的精确模型（如 models/trashcan_640.pt），结果模棱两可时在候选框周围复查")
+    parser.add_argument("--cascade-below", type=float, default=0.85, help="最高分低于该值时升级到精确模型")
+    parser.add_argument("--cascade-margin", type=float, default=0.2,
+                        help="重叠的两个不同类别框分差小于该值时升级")
+    parser.add_argument("--cascade-conf", type=float, default=0.4, help="快速模型候选框的最低分")
+    parser.add_argument("--cam-format", choices=FORMATS, help="摄像头输出格式，默认由驱动决定")
+    parser.add_argument("--cam-size", help="摄像头分辨率 WxH；auto 选择能覆盖裁切区域的最小原生分辨率")
+    parser.add_argument("--cam-fps", type=float, help="摄像头帧率")
+    parser.add_argument("--cam-buffer", type=int, default=1, help="驱动缓冲帧数，1 表示只保留最新一帧")
+    parser.add_argument("--exposure", type=float, help="固定曝光值（V4L2 下单位为 100us），默认自动曝光")
+    parser.add_argument("--white-balance", type=int, help="固定白平衡色温（K），默认自动白平衡")
+    parser.add_argument("--remote", metavar="HOST:PORT",
+                        help="把推理交给局域网里运行 detector_daemon.py --socket HOST:PORT 的机器，"
+                             "服务端慢或断开时自动改用本地 --model")
+    parser.add_argument("--remote-timeout", type=float, default=0.2,
+                        help="每帧等待服务端的最长时间（秒），超时的帧本地推理")
+    parser.add_argument("--remote-inflight", type=int, default=2,
+                        help="最多保留多少个超时未回的远程请求，连续这么多帧超时后断开重连")
+    parser.add_argument("--hot-reload", action="store_true",
+                        help="监视 --model 文件，更新后在后台加载预热并无停顿切换；也可发送 SIGHUP 触发")
+    parser.add_argument("--reload-poll", type=float, default=2.0, help="监视模型文件的间隔（秒）")
+    parser.add_argument("--harvest", metavar="DIR",
+                        help="把低置信度、类别跳变、易混淆的画面和预测存成 labelme 格式，用于再训练")
+    parser.add_argument("--harvest-low-conf", type=float, default=0.8, help="低于该分数的检测算低置信度")
+    parser.add_argument("--harvest-interval", type=float, default=2.0, help="两次保存之间的最短间隔（秒）")
+    parser.add_argument("--harvest-quota-mb", type=float, default=200.0, help="难例目录的总大小上限（MB）")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="在 127.0.0.1 的该端口提供 Prometheus 指标（/metrics），0 表示关闭")
+    parser.add_argument("--metrics-file", help="定期把指标快照追加到该文件（JSON 行，自动滚动）")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="写指标文件的间隔（秒）")
+    return parser
+
+
+_metrics = None
+
+
+def build_metrics(args):
+    """按命令行参数创建指标，同一进程里的多个引擎共用一个（只监听一个端口）"""
+    global _metrics
+    if not args.metrics_port and not args.metrics_file:
+        return None
+    if _metrics is None:
+        _metrics = Metrics()
+        if args.metrics_port:
+            _metrics.serve(args.metrics_port)
+        if args.metrics_file:
+            _metrics.start_file(args.metrics_file, args.metrics_interval)
+    return _metrics
+
+
+_reloader = None
+
+
+def build_reloader(args, backend, roi=None):
+    """按命令行参数创建模型热更新，同一进程里共用同一个后端的引擎一起切换"""
+    global _reloader
+    if not args.hot_reload:
+        return None
+    if args.remote:
+        print("警告: 远程推理时模型在服务端，--hot-reload 请加在 detector_daemon.py 上")
+        return None
+    if _reloader is None:
+        _reloader = ModelReloader(backend, args.model, args.backend, imgsz=args.imgsz or None,
+                                  crop=args.crop, poll=args.reload_poll, roi=roi).start()
+        _reloader.install_signal()
+        print(f"模型热更新: 监视 {args.model}（或 kill -HUP {os.getpid()}）")
+    return _reloader
+
+
+def build_capture(args, spec):
+    """根据命令行参数创建摄像头采集参数，spec 是摄像头编号"""
+    config = CaptureConfig(fourcc=args.cam_format, fps=args.cam_fps, buffer_size=args.cam_buffer,
+                           exposure=args.exposure, white_balance=args.white_balance)
+    if args.cam_size == "auto":
+        mode = pick_mode(list_modes(int(spec)), args.imgsz or 320, args.cam_format, args.cam_fps or 0)
+        if mode is None:
+            print("警告: 没有找到覆盖裁切区域的摄像头模式，使用默认分辨率")
+        else:
+            print(f"摄像头模式: {mode}")
+            config.fourcc, config.width, config.height = mode.fourcc, mode.width, mode.height
+    elif args.cam_size:
+        config.width, config.height = (int(v) for v in args.cam_size.lower().split("x"))
+    return config
+
+
+def build_roi(args):
+    """根据命令行参数由先验求推理区域，没有 --roi-priors 时返回 None"""
+    if not args.roi_priors:
+        return None
+    roi = prior_roi(load_priors(args.roi_priors), args.roi_classes, args.roi_margin)
+    # 区域会被扩成正方形，按较长的一边估算有效分辨率
+    side = max(roi[2] - roi[0], roi[3] - roi[1])
+    imgsz = args.imgsz or 320
+    print(f"推理区域: x {roi[0]:.2f}-{roi[2]:.2f}, y {roi[1]:.2f}-{roi[3]:.2f}，"
+          f"{imgsz} 输入相当于整个画面 {imgsz / side:.0f}，保持原有效分辨率只需 --imgsz {round(imgsz * side / 32) * 32}")
+    return roi
+
+
+def build_decider(args):
+    """根据命令行参数创建去抖策略"""
+    if args.decider == "consecutive":
+        return Debouncer(args.threshold)
+    if args.decider == "sprt":
+        return SequentialDecider(args.threshold, error=args.decision_error, iou=args.track_iou,
+                                 max_misses=args.track_misses)
+    return TrackDecider(args.threshold, iou=args.track_iou, max_misses=args.track_misses)
+
+
+def build_backend(args):
+    """按命令行参数加载本地模型，或连接远程推理服务（本地模型作为回退）"""
+    if args.remote:
+        return RemoteBackend(args.remote, fallback=lambda: load_backend(args.model, args.backend),
+                             timeout=args.remote_timeout, max_inflight=args.remote_inflight)
+    return load_backend(args.model, args.backend)
+
+
+def build_gates(args):
+    """根据命令行参数创建推理前的门控"""
+    gates = []
+    if args.motion_gate:
+        gates.append(MotionGate(area_thresh=args.motion_thresh, hold=args.motion_hold))
+    if args.quality_gate:
+        gates.append(QualityGate(blur_ratio=args.blur_ratio, clip_thresh=args.clip_thresh,
+                                 max_skip=args.quality_max_skip))
+    return gates
+
+
+def build_engine(args, sinks, realtime=False, backend=None, source=None):
+    """
+    根据命令行参数创建 DetectionEngine
+
+    Args:
+        backend: 已创建的推理后端，None 时按 --model/--backend 加载
+        source: 帧来源参数或已创建的 FrameSource，None 时使用 --source
+    """
+    if source is None:
+        source = args.source
+    stream = str(source)
+    if not isinstance(source, FrameSource):
+        capture = build_capture(args, source) if is_camera(source) else None
+        source = open_source(source, realtime=realtime, capture=capture)
+    else:
+        stream = type(source).__name__
+    if backend is None:
+        backend = build_backend(args)
+    roi = build_roi(args)
+    if args.harvest:
+        sinks = list(sinks) + [HardExampleHarvester(args.harvest, low_conf=args.harvest_low_conf,
+                                                    min_interval=args.harvest_interval,
+                                                    max_total_mb=args.harvest_quota_mb)]
+    engine = DetectionEngine(
+        backend=backend,
+        source=source,
+        sinks=sinks,
+        conf=args.conf,
+        threshold=args.threshold,
+        crop=args.crop,
+        imgsz=args.imgsz or None,
+        stats_interval=args.stats_interval,
+        gates=build_gates(args),
+        scheduler=KeyframeScheduler(args.keyframe, args.track_min_conf) if args.keyframe > 1 else None,
+        decider=build_decider(args),
+        reloader=build_reloader(args, backend, roi),
+        roi=roi,
+    )
+    if args.cascade:
+        engine.cascade = Cascade(load_backend(args.cascade, args.backend), engine.table.labels,
+                                 escalate_below=args.cascade_below, margin=args.cascade_margin,
+                                 candidate_conf=args.cascade_conf)
+    metrics = build_metrics(args)
+    if metrics is not None:
+        # 指标用来源（摄像头编号或文件名）区分多路引擎
+        metrics.attach(engine, stream=stream)
+    return engine
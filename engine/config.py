@@ -0,0 +1,39 @@
+from pathlib import Path
+
+# 仓库根目录，用于定位 trash.names 和模型文件
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+NAMES_FILE = ROOT_DIR / "trash.names"
+DEFAULT_MODEL = "models/trashcan.pt"
+
+# 定义垃圾分类
+TRASH_CATEGORIES = {
+    "可回收": ["bottle", "can", "paperCup"],
+    "厨余": ["carrot", "potato", "radish", "potato_chip"],
+    "有害": ["battery", "pill"],
+    "其他": ["stone", "china", "brick"]
+}
+
+# 定义垃圾分类编号，0 表示未知
+TRASH_CATEGORY_IDS = {
+    "可回收": 1,
+    "厨余": 2,
+    "有害": 3,
+    "其他": 4
+}
+
+UNKNOWN_CATEGORY = "未知"
+
+
+def load_class_names(names_file=NAMES_FILE):
+    """从names文件读取类别名称列表，顺序即类别编号"""
+    with open(names_file, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f.readlines() if line.strip()]
+
+
+def classify_trash(label):
+    """根据类别名称返回垃圾分类"""
+    for category, items in TRASH_CATEGORIES.items():
+        if label in items:
+            return category
+    return UNKNOWN_CATEGORY
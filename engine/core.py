@@ -0,0 +1,280 @@
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from .config import load_class_names
+from .decide import Debouncer
+from .preprocess import Preprocessor
+from .postprocess import ClassTable, Detections
+from .sinks import Sink
+from .timing import StageTimer, process_uptime
+
+perf_counter = time.perf_counter
+
+
+@dataclass
+class FrameResult:
+    """一帧经过整条流水线后的结果"""
+    frame: Any
+    detections: Detections
+    decisions: list
+    raw: Any = None
+    captured_at: float = 0.0
+    inferred: bool = True  # False 表示这一帧没有运行检测器（被门控跳过或由跟踪得到）
+
+
+class DetectionEngine:
+    """
+    检测主循环: decode -> preprocess -> infer -> postprocess -> decide -> emit
+
+    Args:
+        backend: 推理后端，见 engine.backends
+        source: 帧来源，见 engine.sources
+        sinks: 输出列表，见 engine.sinks
+        conf (float): 置信度阈值
+        threshold (int): 连续帧数阈值
+        crop (bool): 是否把画面中心裁切成正方形
+        imgsz (int): 缩放后的边长，None 表示不缩放
+        stats_interval (float): 打印各阶段耗时的间隔（秒），0 表示不打印
+        gates: 推理前的门控列表（如 MotionGate），任何一个返回 False 就跳过这一帧的推理
+        scheduler: 关键帧调度器（KeyframeScheduler），非关键帧用跟踪代替检测
+        cascade: 级联（engine.cascade.Cascade），结果模棱两可时用精确模型复查
+        decider: 去抖策略（如 engine.tracks.TrackDecider），None 表示 Debouncer(threshold)
+        roi: 只对裁切后画面的这块区域推理 (x0, y0, x1, y1)，见 engine.roi
+        reloader: 模型热更新（engine.hotswap.ModelReloader），有新模型时在两帧之间切换
+    """
+
+    def __init__(self, backend, source=None, sinks=(), conf=0.7, threshold=5,
+                 crop=True, imgsz=320, stats_interval=0.0, gates=(), scheduler=None, cascade=None,
+                 decider=None, reloader=None, roi=None):
+        self.backend = backend
+        self.source = source
+        self.sinks = list(sinks)
+        # 只有真正需要画面的输出（显示、录像）才会收到每帧结果，无头模式下这一步为空
+        self.frame_sinks = [sink for sink in self.sinks if type(sink).on_frame is not Sink.on_frame]
+        self.conf = conf
+        self.crop = crop
+        self.imgsz = imgsz
+        self.roi = roi
+        self.preprocessor = Preprocessor(crop, imgsz, roi=roi)
+        self.set_backend(backend)
+        self.decider = decider if decider is not None else Debouncer(threshold)
+        self.gates = list(gates)
+        self.scheduler = scheduler
+        self.cascade = cascade
+        self.reloader = reloader
+        self.model_generation = reloader.generation if reloader is not None else 0
+        self.timer = StageTimer()
+        self.stats_interval = stats_interval
+        self.frames = 0
+        self.first_decision_at = None  # 进程启动到第一个决策的秒数
+        self.metrics = None  # engine.metrics.Metrics.attach 时设置
+        self._last_report = perf_counter()
+
+    @staticmethod
+    def _build_table(backend):
+        """按 trash.names 建类别查找表，模型自带的类别名不一致时以模型为准"""
+        names = load_class_names()
+        model_names = getattr(backend, "names", None)
+        if model_names:
+            if isinstance(model_names, dict):
+                model_names = [model_names[i] for i in sorted(model_names)]
+            if list(model_names) != names:
+                print(f"警告: 模型类别与 trash.names 不一致，使用模型类别: {model_names}")
+                names = list(model_names)
+        return ClassTable(names)
+
+    def set_backend(self, backend, table=None):
+        """
+        换推理后端，类别表随之更新（table 为 None 时按后端新建）；
+        类别变了时清空去抖状态（里面是旧模型的类别号），级联的易混淆类别号随之重建
+        """
+        self.backend = backend
+        # 后端能直接吃预处理好的 blob 时跳过它自己的 letterbox/归一化
+        self.fused = (bool(self.imgsz) and hasattr(backend, "predict_blob")
+                      and backend.supports_blob(self.imgsz))
+        if table is None:
+            table = self._build_table(backend)
+        decider = getattr(self, "decider", None)
+        if decider is not None and list(table.labels) != list(self.table.labels):
+            decider.reset()
+        self.table = table
+        cascade = getattr(self, "cascade", None)
+        if cascade is not None:
+            # 级联的易混淆类别号来自快速模型的类别表
+            cascade.set_names(table.labels)
+
+    def sync_model(self):
+        """热更新准备好新模型时在两帧之间切换过去，没有新模型时只是一次比较"""
+        if self.reloader is not None and self.model_generation != self.reloader.generation:
+            self.reloader.apply(self)
+
+    def warmup(self, runs=2):
+        """
+        用全零图像按输入尺寸空跑几次推理，把模型初始化、内存分配等一次性开销
+        放在第一帧之前，返回耗时（秒）。不经过门控和去抖，不影响状态。
+        """
+        size = self.imgsz or 640
+        frame = np.zeros((size, size, 3), dtype=np.uint8)
+        t0 = perf_counter()
+        for _ in range(runs):
+            self.infer(self.preprocessor(frame))
+        return perf_counter() - t0
+
+    # ---- 各阶段 ----
+
+    def decode(self):
+        t0 = perf_counter()
+        frame = self.source.read()
+        self.timer.add("decode", perf_counter() - t0)
+        return frame
+
+    def preprocess(self, frame):
+        """裁切并缩放到预分配的缓冲区，返回的图像会被之后的帧覆盖（见 Preprocessor）"""
+        return self.preprocessor(frame)
+
+    def infer(self, frame):
+        # 级联需要看到低于 conf 的候选框才能判断是否模棱两可，最终仍在 postprocess 按 conf 过滤
+        conf = self.conf if self.cascade is None else min(self.conf, self.cascade.candidate_conf)
+        if self.fused and self.preprocessor.owns(frame):
+            raw = self.backend.predict_blob(self.preprocessor.to_blob(frame), conf)
+        else:
+            raw = self.backend.predict(frame, conf)
+        if self.cascade is not None:
+            raw = self.cascade.refine(raw, self.preprocessor.source, frame.shape)
+        return raw
+
+    def postprocess(self, raw):
+        """把后端输出的 (boxes, scores, classes) 一次性转换为 Detections 数组"""
+        return Detections.from_raw(raw, self.table, self.conf)
+
+    def decide(self, detections):
+        return self.decider.update(detections)
+
+    # ---- 组合 ----
+
+    def process(self, frame, captured_at=None):
+        """对一帧执行 preprocess 到 decide，返回 FrameResult"""
+        self.sync_model()
+        t0 = perf_counter()
+        frame = self.preprocess(frame)
+        self.timer.add("preprocess", perf_counter() - t0)
+        if captured_at is None:
+            captured_at = t0
+        if not self.passes_gates(frame):
+            return self.skip(frame, captured_at)
+        t1 = perf_counter()
+        if self.scheduler is None:
+            raw, inferred = self.infer(frame), True
+        else:
+            raw, inferred = self.scheduler.process(frame, self.infer)
+        self.timer.add("infer" if inferred else "track", perf_counter() - t1)
+        return self.complete(frame, raw, captured_at, inferred)
+
+    def passes_gates(self, frame):
+        """预处理后的帧是否需要推理"""
+        if not self.gates:
+            return True
+        t0 = perf_counter()
+        # 每个门控都看每一帧：门控内部有随帧更新的状态（上一帧、清晰度参考值），
+        # 短路求值会让后面的门控只看到前面放行的帧，状态随之偏移
+        passed = all([gate.check(frame) for gate in self.gates])
+        self.timer.add("gate", perf_counter() - t0)
+        return passed
+
+    def skip(self, frame, captured_at):
+        """被门控跳过的帧，返回空结果"""
+        self.frames += 1
+        return FrameResult(frame, Detections.empty(self.table), [],
+                           captured_at=captured_at, inferred=False)
+
+    def complete(self, frame, raw, captured_at, inferred=True):
+        """推理之后的 postprocess 和 decide，批量推理时由外部传入 raw"""
+        t0 = perf_counter()
+        detections = self.postprocess(raw)
+        t1 = perf_counter()
+        # 跟踪得到的帧只是把关键帧的类别和分数带过来，不是新的证据，不参与去抖投票，
+        # 否则一次（可能是误检的）检测就能凑满 threshold 票
+        decisions = self.decide(detections) if inferred else []
+        self.timer.add("postprocess", t1 - t0)
+        self.timer.add("decide", perf_counter() - t1)
+        self.frames += 1
+        return FrameResult(frame, detections, decisions, raw=raw, captured_at=captured_at,
+                           inferred=inferred)
+
+    def emit_decision(self, decision):
+        if self.first_decision_at is None:
+            self.first_decision_at = process_uptime()
+            print(f"启动到首个决策: {self.first_decision_at:.2f}s")
+        for sink in self.sinks:
+            sink.on_decision(decision)
+
+    def emit_frame(self, result):
+        for sink in self.frame_sinks:
+            sink.on_frame(result)
+
+    def emit(self, result):
+        t0 = perf_counter()
+        for decision in result.decisions:
+            print(f" {decision.label}, {decision.trash_type}")
+            self.emit_decision(decision)
+        self.emit_frame(result)
+        self.timer.add("emit", perf_counter() - t0)
+
+    @property
+    def quit_requested(self):
+        return any(sink.quit for sink in self.sinks)
+
+    def step(self):
+        """处理一帧，来源读完或用户退出时返回 False"""
+        frame = self.decode()
+        if frame is None:
+            return False
+        self.emit(self.process(frame, self.source.captured_at))
+        self.report()
+        return not self.quit_requested
+
+    def report(self, force=False):
+        if not self.stats_interval and not force:
+            return
+        now = perf_counter()
+        if force or now - self._last_report >= self.stats_interval:
+            self._last_report = now
+            print(f"[{self.frames} 帧] {self.timer.summary()}")
+            for line in self.stats_lines():
+                print(f"    {line}")
+
+    def stats_lines(self):
+        """门控等附加组件的统计信息"""
+        lines = [gate.stats() for gate in self.gates]
+        if self.scheduler is not None:
+            lines.append(self.scheduler.stats())
+        if self.cascade is not None:
+            lines.append(self.cascade.stats())
+        if self.reloader is not None:
+            lines.append(self.reloader.stats())
+        if hasattr(self.backend, "stats"):
+            lines.append(self.backend.stats())
+        if hasattr(self.decider, "stats"):
+            lines.append(self.decider.stats())
+        lines.extend(sink.stats() for sink in self.sinks if hasattr(sink, "stats"))
+        return lines
+
+    def run(self):
+        try:
+            while self.step():
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self.source is not None:
+            self.source.release()
+        if hasattr(self.backend, "close"):
+            self.backend.close()
+        for sink in self.sinks:
+            sink.close()
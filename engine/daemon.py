@@ -0,0 +1,238 @@
+import os
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import asdict
+
+from .core import DetectionEngine
+from .decide import Decision
+from .ipc import (DEFAULT_SOCKET, connect, decode_image, encode_image, lists_to_raw,
+                  parse_address, raw_to_lists, recv_message, send_message)
+
+perf_counter = time.perf_counter
+
+
+class DetectorDaemon:
+    """
+    常驻检测进程：模型只加载和预热一次，通过 socket 接收画面、返回检测框和分拣决策。
+
+    每个客户端流（stream 名）有自己的 DetectionEngine，去抖和门控状态互不影响，
+    推理后端在所有流之间共享，用一把锁串行调用。
+
+    支持的命令:
+        ping   -> 模型、加载耗时、预热耗时、运行时间
+        detect -> 负载是一帧图像，返回 boxes/scores/classes/decisions
+        reset  -> 清空某个流的去抖状态
+        infer  -> 只推理不去抖：负载是已经裁切缩放好的图像，返回 boxes/scores/classes
+                  （engine.remote.RemoteBackend 用它把推理卸载到局域网里更强的机器）
+        reload -> 在后台加载（可指定 model 路径）并预热新模型，就绪后各流在下一帧切换
+        stats  -> 各流的帧数和阶段耗时
+
+    Args:
+        backend: 已加载的推理后端
+        load_time (float): 加载模型用了多少秒，只用于报告
+        gate_factory: 无参函数，为每个新流创建门控列表
+        decider_factory: 无参函数，为每个新流创建去抖策略，None 表示 Debouncer
+        reloader: 模型热更新（engine.hotswap.ModelReloader），None 时不支持 reload 命令
+        engine_kwargs: 每个流的 DetectionEngine 参数（conf、threshold、crop、imgsz）
+    """
+
+    def __init__(self, backend, load_time=0.0, gate_factory=None, decider_factory=None,
+                 reloader=None, **engine_kwargs):
+        self.backend = backend
+        self.engine_kwargs = engine_kwargs
+        self.gate_factory = gate_factory
+        self.decider_factory = decider_factory
+        self.reloader = reloader
+        self.streams = {}
+        self.lock = threading.Lock()
+        self.load_time = load_time
+        self.warmup_time = 0.0
+        self.started_at = time.time()
+        self.requests = 0
+
+    def stream(self, name):
+        engine = self.streams.get(name)
+        if engine is None:
+            gates = self.gate_factory() if self.gate_factory else ()
+            decider = self.decider_factory() if self.decider_factory else None
+            engine = DetectionEngine(self.current_backend, gates=gates, decider=decider, reloader=self.reloader,
+                                     **self.engine_kwargs)
+            self.streams[name] = engine
+        return engine
+
+    @property
+    def current_backend(self):
+        """热更新之后的最新后端"""
+        return self.reloader.backend if self.reloader is not None else self.backend
+
+    def warmup(self, runs=3):
+        self.warmup_time = self.stream("default").warmup(runs)
+        return self.warmup_time
+
+    # ---- 命令 ----
+
+    def handle(self, header, payload):
+        cmd = header.get("cmd")
+        if cmd == "detect":
+            return self.detect(header, payload)
+        if cmd == "infer":
+            return self.infer(header, payload)
+        if cmd == "ping":
+            with self.lock:
+                names = self.stream("default").table.labels.tolist()
+            return {"ok": True, "model": getattr(self.current_backend, "model_path", None),
+                    "names": names,
+                    "crop": self.engine_kwargs.get("crop", True),
+                    "imgsz": self.engine_kwargs.get("imgsz", 320),
+                    "roi": self.engine_kwargs.get("roi"),
+                    "load_s": self.load_time, "warmup_s": self.warmup_time,
+                    "uptime_s": time.time() - self.started_at, "pid": os.getpid()}
+        if cmd == "reset":
+            with self.lock:
+                self.stream(header.get("stream", "default")).decider.reset()
+            return {"ok": True}
+        if cmd == "reload":
+            if self.reloader is None:
+                return {"ok": False, "error": "守护进程没有启用模型热更新"}
+            self.reloader.request(header.get("model"))
+            return {"ok": True, "generation": self.reloader.generation}
+        if cmd == "stats":
+            with self.lock:
+                reload = {} if self.reloader is None else {
+                    "generation": self.reloader.generation, "reloads": self.reloader.reloads,
+                    "failures": self.reloader.failures, "max_pause_s": self.reloader.max_pause}
+                return {"ok": True, "requests": self.requests, "reload": reload,
+                        "streams": {name: {"frames": e.frames, "timing": e.timer.summary()}
+                                    for name, e in self.streams.items()}}
+        return {"ok": False, "error": f"未知命令: {cmd}"}
+
+    def detect(self, header, payload):
+        t0 = perf_counter()
+        frame = decode_image(header, payload)
+        if frame is None:
+            return {"ok": False, "error": "无法解码图像"}
+        with self.lock:
+            self.requests += 1
+            result = self.stream(header.get("stream", "default")).process(frame)
+        reply = {"ok": True, "inferred": result.inferred,
+                 "decisions": [asdict(d) for d in result.decisions],
+                 "server_ms": (perf_counter() - t0) * 1000}
+        reply.update(raw_to_lists(result.detections.raw))
+        return reply
+
+    def infer(self, header, payload):
+        t0 = perf_counter()
+        image = decode_image(header, payload)
+        if image is None:
+            return {"ok": False, "error": "无法解码图像"}
+        with self.lock:
+            self.requests += 1
+            raw = self.current_backend.predict(image, header.get("conf", 0.25))
+        reply = {"ok": True, "server_ms": (perf_counter() - t0) * 1000}
+        reply.update(raw_to_lists(raw))
+        return reply
+
+    # ---- 服务 ----
+
+    def serve(self, address=DEFAULT_SOCKET):
+        """在 Unix socket 路径或 host:port 上服务，直到 Ctrl+C"""
+        family, addr = parse_address(address)
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        header, payload = recv_message(self.request)
+                    except (ConnectionError, OSError):
+                        return
+                    try:
+                        reply = daemon.handle(header, payload)
+                    except Exception as e:
+                        reply = {"ok": False, "error": str(e)}
+                    if "seq" in header:
+                        # 客户端可以不等回复连续发送多个请求，按 seq 对应回复
+                        reply["seq"] = header["seq"]
+                    send_message(self.request, reply)
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.unlink(addr)
+            server = socketserver.ThreadingUnixStreamServer(addr, Handler)
+        else:
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            server = socketserver.ThreadingTCPServer(addr, Handler)
+        server.daemon_threads = True
+        print(f"检测服务已就绪: {address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if family == socket.AF_UNIX and os.path.exists(addr):
+                os.unlink(addr)
+
+
+class DaemonClient:
+    """
+    DetectorDaemon 的客户端，不加载模型，也不导入 torch/onnxruntime
+
+    Args:
+        address: Unix socket 路径或 host:port
+        stream (str): 流名，同一个垃圾桶应始终使用同一个名字
+        encoding (str): raw 发送原始像素（本机），jpeg 压缩后发送（网络）
+        wait (float): 守护进程还没启动时最多等待的秒数
+    """
+
+    def __init__(self, address=DEFAULT_SOCKET, stream="default", encoding="raw", wait=30.0,
+                 timeout=10.0):
+        self.address = address
+        self.stream = stream
+        self.encoding = encoding
+        self.timeout = timeout
+        self.sock = self._connect(wait)
+
+    def _connect(self, wait):
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                return connect(self.address, timeout=self.timeout)
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"无法连接检测服务: {self.address}")
+                time.sleep(0.2)
+
+    def request(self, header, payload=b""):
+        send_message(self.sock, header, payload)
+        reply, _ = recv_message(self.sock)
+        if not reply.get("ok"):
+            raise RuntimeError(f"检测服务错误: {reply.get('error')}")
+        return reply
+
+    def ping(self):
+        return self.request({"cmd": "ping"})
+
+    def reset(self):
+        return self.request({"cmd": "reset", "stream": self.stream})
+
+    def reload(self, model_path=None):
+        """让守护进程在后台加载新模型，立即返回"""
+        return self.request({"cmd": "reload", "model": model_path})
+
+    def detect(self, frame):
+        """
+        Returns:
+            raw: (boxes, scores, classes)，坐标在守护进程预处理后的图像上
+            decisions: Decision 列表
+            reply: 完整的回复（含 inferred、server_ms）
+        """
+        fields, payload = encode_image(frame, self.encoding)
+        reply = self.request(dict(fields, cmd="detect", stream=self.stream), payload)
+        decisions = [Decision(**d) for d in reply["decisions"]]
+        return lists_to_raw(reply), decisions, reply
+
+    def close(self):
+        self.sock.close()
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import numpy as np
+
+from .sources import IMAGE_SUFFIXES
+
+
+def list_images(*dirs):
+    """递归列出若干目录下的所有图片，不存在的目录直接跳过"""
+    paths = []
+    for d in dirs:
+        d = Path(d)
+        if d.is_dir():
+            paths.extend(p for p in d.rglob('*') if p.suffix.lower() in IMAGE_SUFFIXES)
+    return sorted(paths)
+
+
+def find_label(img_path):
+    """
+    查找图片对应的 YOLO 标签：先找同目录同名 .txt（labelme2yolo 后直接拷进 datasets/train 的情况），
+    再找 images/ -> labels/ 的同名文件（divide_train_valid.py 划分后的验证集）
+    """
+    img_path = Path(img_path)
+    candidates = [img_path.with_suffix('.txt')]
+    if img_path.parent.name == 'images':
+        candidates.append(img_path.parent.parent / 'labels' / (img_path.stem + '.txt'))
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def read_yolo_labels(txt_path, img_w, img_h):
+    """
+    读取 YOLO 格式标签，换算成像素坐标
+
+    Returns:
+        boxes (N, 4) xyxy, classes (N,)
+    """
+    rows = []
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5:
+                rows.append([float(v) for v in parts[:5]])
+    if not rows:
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.int64)
+    data = np.array(rows, dtype=np.float32)
+    cx, cy = data[:, 1] * img_w, data[:, 2] * img_h
+    w, h = data[:, 3] * img_w, data[:, 4] * img_h
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return boxes, data[:, 0].astype(np.int64)
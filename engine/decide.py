@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class Decision:
+    """一次分拣决策"""
+    cls_id: int
+    label: str
+    trash_type: str
+    category_id: int
+    score: float
+    track_id: int = -1  # 按物体去抖时的轨迹编号，见 engine.tracks
+
+    @classmethod
+    def from_detections(cls, detections, i):
+        cls_id = int(detections.classes[i])
+        table = detections.table
+        return cls(cls_id, table.labels[cls_id], table.trash_types[cls_id],
+                   int(detections.category_ids[i]), float(detections.scores[i]))
+
+
+class Debouncer:
+    """
+    连续帧去抖：同一个 cls_id 连续出现 threshold 次才输出一次决策。
+
+    与原来各 detect 脚本的逻辑一致，状态在所有检测框之间共享：
+    按顺序遍历每个框，类别相同则计数加一，否则从 1 重新计数，计数到 threshold 时触发并清零。
+    这里用数组运算一次处理一帧的所有框，结果与逐个遍历完全相同。
+    """
+
+    def __init__(self, threshold=5):
+        self.threshold = threshold
+        self.last_cls_id = None
+        self.frame_count = 0
+
+    def reset(self):
+        self.last_cls_id = None
+        self.frame_count = 0
+
+    def update(self, detections):
+        """输入一帧的 Detections，返回触发的 Decision 列表"""
+        classes = detections.classes
+        n = len(classes)
+        if n == 0:
+            return []
+
+        # 每段连续相同类别的起点，以及每个框在所在段中的序号（从 1 开始）
+        starts = np.flatnonzero(np.r_[True, classes[1:] != classes[:-1]])
+        run_index = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+        position = np.arange(1, n + 1) - starts[run_index]
+
+        # 第一段如果与上一帧最后的类别相同，接着之前的计数
+        carry = np.zeros(n, np.int64)
+        if classes[0] == self.last_cls_id:
+            carry[run_index == 0] = self.frame_count
+
+        # 触发后计数清零，所以段内的计数就是 (carry + position) 对 threshold 取模
+        counts = carry + position
+        fired = np.flatnonzero(counts % self.threshold == 0)
+
+        self.last_cls_id = int(classes[-1])
+        self.frame_count = int(counts[-1] % self.threshold)
+        return [Decision.from_detections(detections, i) for i in fired]
@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+
+from .config import load_class_names
+
+# 每个类别一种颜色 (BGR)，按 cls_id 取模
+PALETTE = [
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255),
+    (49, 210, 207), (10, 249, 72), (23, 204, 146), (134, 219, 61),
+    (52, 147, 26), (187, 212, 0), (168, 153, 44), (255, 194, 0),
+]
+
+
+class Overlay:
+    """
+    轻量绘制：把画面拷进预先分配好的缓冲区，直接用检测结果的 numpy 数组画框，
+    不像 result.plot() 那样每帧重新分配一张带注释的图像。
+
+    Args:
+        names: 类别名称，默认读取 trash.names
+        labels (bool): 是否绘制类别名和分数
+    """
+
+    def __init__(self, names=None, labels=True):
+        names = names if names is not None else load_class_names()
+        if isinstance(names, dict):
+            names = [names[i] for i in sorted(names)]
+        self.names = list(names)
+        self.labels = labels
+        self._buffer = None
+
+    def render(self, frame, raw=None, text=None):
+        """
+        Args:
+            frame: 原始画面，不会被修改
+            raw: (boxes, scores, classes)，None 表示没有检测结果
+            text: 左上角的附加文字
+
+        Returns:
+            绘制后的缓冲区，下次调用时会被覆盖
+        """
+        if self._buffer is None or self._buffer.shape != frame.shape:
+            self._buffer = np.empty_like(frame)
+        buf = self._buffer
+        np.copyto(buf, frame)
+        if raw is not None and len(raw[0]):
+            boxes, scores, classes = raw
+            for (x1, y1, x2, y2), score, cls_id in zip(boxes.astype(np.int32).tolist(),
+                                                       scores.tolist(), classes.tolist()):
+                color = PALETTE[cls_id % len(PALETTE)]
+                cv2.rectangle(buf, (x1, y1), (x2, y2), color, 2)
+                if self.labels:
+                    name = self.names[cls_id] if cls_id < len(self.names) else str(cls_id)
+                    cv2.putText(buf, f"{name} {score:.2f}", (x1, max(y1 - 4, 10)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv2.LINE_AA)
+        if text:
+            cv2.putText(buf, text, (4, 14), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+        return buf
@@ -0,0 +1,151 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    运动门控：画面没有变化时跳过推理。
+
+    在缩小的灰度图上同时比较上一帧（有东西在动）和背景（有东西放进来了），
+    任何一个超过阈值就推理。画面连续 hold 帧不动后认为场景已稳定，
+    把当前画面作为新背景，停止推理，直到下一次变化。
+
+    Args:
+        size (int): 缩小后的边长
+        pixel_thresh (int): 像素灰度差超过该值算变化
+        area_thresh (float): 变化像素占比超过该值算有变化
+        hold (int): 画面静止后继续推理的帧数，应不小于去抖的连续帧数阈值
+    """
+
+    def __init__(self, size=64, pixel_thresh=25, area_thresh=0.01, hold=10):
+        self.size = size
+        self.pixel_thresh = pixel_thresh
+        self.area_thresh = area_thresh
+        self.hold = hold
+        self._small = np.empty((size, size), np.uint8)
+        self._prev = None
+        self._background = None
+        self._still = 0
+        self.frames = 0
+        self.passed = 0
+
+    def _changed(self, a, b):
+        diff = cv2.absdiff(a, b)
+        cv2.threshold(diff, self.pixel_thresh, 255, cv2.THRESH_BINARY, dst=diff)
+        return cv2.countNonZero(diff) > self.area_thresh * diff.size
+
+    def check(self, frame):
+        """返回这一帧是否需要推理"""
+        self.frames += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        cv2.resize(gray, (self.size, self.size), dst=self._small, interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(self._small, (5, 5), 0)
+
+        if self._prev is None:
+            self._prev = self._background = small
+            self.passed += 1
+            return True
+
+        moving = self._changed(small, self._prev)
+        self._prev = small
+        self._still = 0 if moving else self._still + 1
+        if self._still >= self.hold:
+            # 场景稳定，当前画面成为新背景
+            self._background = small
+            present = False
+        else:
+            present = self._changed(small, self._background)
+
+        active = moving or present
+        if active:
+            self.passed += 1
+        return active
+
+    @property
+    def hit_ratio(self):
+        """实际推理的帧占比"""
+        return self.passed / self.frames if self.frames else 0.0
+
+    def stats(self):
+        return (f"运动门控: 推理 {self.passed}/{self.frames} 帧 ({self.hit_ratio:.0%}), "
+                f"节省 {self.frames - self.passed} 次推理")
+
+
+class QualityGate:
+    """
+    画质门控：在缩小的灰度图上给画面打分，运动模糊或曝光过度/不足的帧不推理。
+
+    - 清晰度用拉普拉斯方差，低于最近画面清晰度（指数滑动平均）的 blur_ratio 倍算模糊，
+      物体正在落下时的运动模糊会让方差明显下降
+    - 灰度 >= 250 或 <= 5 的像素占比超过 clip_thresh 算过曝或欠曝
+
+    连续跳过 max_skip 帧后强制推理一帧，画面一直不好（如光线变化）时不会完全停止检测，
+    只是降低推理频率。
+
+    Args:
+        size (int): 缩小后的边长
+        blur_ratio (float): 清晰度低于参考值的该倍数算模糊，0 表示不检查
+        clip_thresh (float): 过亮或过暗像素的占比阈值，0 表示不检查
+        max_skip (int): 最多连续跳过的帧数
+        alpha (float): 参考清晰度的滑动平均系数
+    """
+
+    def __init__(self, size=128, blur_ratio=0.35, clip_thresh=0.25, max_skip=5, alpha=0.05):
+        self.size = size
+        self.blur_ratio = blur_ratio
+        self.clip_thresh = clip_thresh
+        self.max_skip = max_skip
+        self.alpha = alpha
+        self._small = np.empty((size, size), np.uint8)
+        self._reference = None
+        self._skipped = 0
+        self.frames = 0
+        self.passed = 0
+        self.forced = 0
+        self.reasons = {"blur": 0, "overexposed": 0, "underexposed": 0}
+
+    def score(self, frame):
+        """返回 (清晰度, 过亮像素占比, 过暗像素占比)"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        cv2.resize(gray, (self.size, self.size), dst=self._small, interpolation=cv2.INTER_AREA)
+        _, std = cv2.meanStdDev(cv2.Laplacian(self._small, cv2.CV_16S))
+        n = self._small.size
+        bright = np.count_nonzero(self._small >= 250) / n
+        dark = np.count_nonzero(self._small <= 5) / n
+        return float(std[0, 0]) ** 2, bright, dark
+
+    def _reason(self, sharpness, bright, dark):
+        if self.clip_thresh:
+            if bright > self.clip_thresh:
+                return "overexposed"
+            if dark > self.clip_thresh:
+                return "underexposed"
+        if self.blur_ratio and sharpness < self.blur_ratio * self._reference:
+            return "blur"
+        return None
+
+    def check(self, frame):
+        """返回这一帧是否需要推理"""
+        self.frames += 1
+        sharpness, bright, dark = self.score(frame)
+        if self._reference is None:
+            self._reference = sharpness
+        reason = self._reason(sharpness, bright, dark)
+        self._reference += self.alpha * (sharpness - self._reference)
+        if reason is None:
+            self._skipped = 0
+        elif self._skipped >= self.max_skip:
+            self._skipped = 0
+            self.forced += 1
+        else:
+            self._skipped += 1
+            self.reasons[reason] += 1
+            return False
+        self.passed += 1
+        return True
+
+    def stats(self):
+        skipped = self.frames - self.passed
+        return (f"画质门控: 跳过 {skipped}/{self.frames} 帧（模糊 {self.reasons['blur']}, "
+                f"过曝 {self.reasons['overexposed']}, 欠曝 {self.reasons['underexposed']}）, "
+                f"强制推理 {self.forced} 帧")
@@ -0,0 +1,152 @@
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .cascade import CONFUSABLE_PAIRS
+from .ops import box_iou_matrix
+from .sinks import Sink
+from .tracks import IouTracker
+
+
+class HardExampleHarvester(Sink):
+    """
+    现场难例收集：低置信度、同一物体在相邻帧之间类别跳变、易混淆类别（如 china / radish）
+    重叠的画面，连同当时的预测一起存成 labelme 格式（jpg + json），
+    可以直接用 check_labelme.py 检查、修正后用 labelme2yolo.py 转换进训练集。
+
+    推理循环里只做判断和一次画面拷贝，编码和写盘在后台线程完成，队列满时直接丢弃。
+    为了少写 SD 卡：两次保存之间至少隔 min_interval 秒，目录总大小超过配额后停止收集。
+
+    Args:
+        output_dir: 保存目录
+        low_conf (float): 有检测框低于该分数时算低置信度（应高于引擎的 conf）
+        min_interval (float): 两次保存之间的最短间隔（秒）
+        max_total_mb (float): 目录总大小上限（MB）
+        confusable: 易混淆的类别名对
+        overlap (float): 两个框算同一物体的 IoU
+        quality (int): JPEG 质量
+        queue_size (int): 后台写入队列长度
+    """
+
+    def __init__(self, output_dir="harvest", low_conf=0.8, min_interval=2.0, max_total_mb=200.0,
+                 confusable=CONFUSABLE_PAIRS, overlap=0.5, quality=90, queue_size=8):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.low_conf = low_conf
+        self.min_interval = min_interval
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+        self.confusable = {frozenset(pair) for pair in confusable}
+        self.overlap = overlap
+        self.quality = quality
+        self.tracker = IouTracker(overlap, max_misses=2, history=1)
+        self.used_bytes = sum(f.stat().st_size for f in self.output_dir.iterdir() if f.is_file())
+        self.candidates = {"lowconf": 0, "flip": 0, "confusable": 0}
+        self.saved = 0
+        self.rate_limited = 0
+        self.dropped = 0
+        self.quota_full = self.used_bytes >= self.max_total_bytes
+        self._last_saved = 0.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="harvest", daemon=True)
+        self._thread.start()
+
+    # ---- 推理线程 ----
+
+    def _reason(self, detections):
+        """这一帧为什么值得收集，不值得时返回 None"""
+        classes = detections.classes
+        labels = detections.table.labels
+        # 跟踪每帧都要更新，否则跳变判断会漏掉中间的帧
+        reason = None
+        for track, cls_id in zip(self.tracker.update(detections.boxes), classes):
+            if track.votes and track.votes[-1] != cls_id:
+                pair = frozenset((labels[track.votes[-1]], labels[cls_id]))
+                reason = "confusable" if pair in self.confusable else reason or "flip"
+            track.votes.append(int(cls_id))
+        if reason is None and len(classes) > 1:
+            ious = box_iou_matrix(detections.boxes, detections.boxes)
+            for i, j in zip(*np.nonzero(np.triu(ious > self.overlap, 1))):
+                if frozenset((labels[classes[i]], labels[classes[j]])) in self.confusable:
+                    reason = "confusable"
+                    break
+        if reason is None and detections.scores.min() < self.low_conf:
+            reason = "lowconf"
+        return reason
+
+    def on_frame(self, result):
+        detections = result.detections
+        if not len(detections):
+            self.tracker.update(detections.boxes)
+            return
+        reason = self._reason(detections)
+        if reason is None or self.quota_full:
+            return
+        self.candidates[reason] += 1
+        now = time.monotonic()
+        if now - self._last_saved < self.min_interval:
+            self.rate_limited += 1
+            return
+        shapes = [{"label": str(d.label), "points": [list(d.xyxy[:2]), list(d.xyxy[2:])],
+                   "group_id": None, "description": f"score={d.score:.3f}",
+                   "shape_type": "rectangle", "flags": {}} for d in detections]
+        try:
+            # 预处理后的画面会被之后的帧覆盖，放进队列前拷贝
+            self._queue.put_nowait((result.frame.copy(), shapes, reason))
+            self._last_saved = now
+        except queue.Full:
+            self.dropped += 1
+
+    # ---- 写入线程 ----
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+            except OSError as e:
+                print(f"难例保存失败: {e}")
+
+    def _write(self, frame, shapes, reason):
+        if self.used_bytes >= self.max_total_bytes:
+            if not self.quota_full:
+                print(f"难例目录已达配额 {self.max_total_bytes / 1024 / 1024:.0f}MB，停止收集")
+            self.quota_full = True
+            return
+        stem = f"{time.strftime('%Y%m%d_%H%M%S')}_{self.saved:05d}_{reason}"
+        image_path = self.output_dir / f"{stem}.jpg"
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        h, w = frame.shape[:2]
+        annotation = json.dumps({
+            "version": "4.5.6",
+            "flags": {reason: True},
+            "shapes": shapes,
+            "imagePath": image_path.name,
+            "imageData": None,
+            "imageHeight": h,
+            "imageWidth": w,
+        }, ensure_ascii=False, indent=2).encode("utf-8")
+        # 图像和标注各一次整块写入
+        image_path.write_bytes(buf.tobytes())
+        image_path.with_suffix(".json").write_bytes(annotation)
+        self.used_bytes += len(buf) + len(annotation)
+        self.saved += 1
+
+    def stats(self):
+        c = self.candidates
+        return (f"难例收集: 保存 {self.saved}, 候选 低置信度 {c['lowconf']} / 类别跳变 {c['flip']} / "
+                f"易混淆 {c['confusable']}, 限速跳过 {self.rate_limited}, 队列满丢弃 {self.dropped}, "
+                f"已用 {self.used_bytes / 1024 / 1024:.1f}MB" + ("（已满）" if self.quota_full else ""))
+
+    def close(self):
+        """写完队列里剩下的样本后退出"""
+        self._queue.put(None)
+        self._thread.join(10.0)
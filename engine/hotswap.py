@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from .backends import load_backend
+from .core import DetectionEngine
+from .preprocess import Preprocessor
+
+perf_counter = time.perf_counter
+
+
+class ModelReloader:
+    """
+    不停检测循环更新模型：在后台线程加载并预热新权重，成功后把它标记为新一代，
+    各个 DetectionEngine 在两帧之间发现代数变化时换上新后端（只是几次属性赋值）。
+    预热推理抛出异常或输出格式不对时保留旧模型（回滚），检测循环始终不停。
+
+    触发方式:
+        - watch=True 时轮询模型文件，修改时间或大小变化且写完（连续两次轮询不变）后重新加载
+        - request() 手动触发，可以换成另一个模型路径（SIGHUP、守护进程的 reload 命令都调用它）
+
+    Args:
+        backend: 当前正在使用的推理后端
+        model_path: 模型路径
+        backend_name (str): 推理后端类型，见 engine.backends
+        threads (int): 推理线程数，0 表示默认
+        imgsz (int): 预热用的输入边长，None 表示 640
+        crop (bool): 预热时是否裁切，与引擎一致
+        roi: 预热时的推理区域，与引擎一致
+        watch (bool): 是否监视模型文件
+        poll (float): 监视的轮询间隔（秒）
+        warmup_runs (int): 预热推理次数
+    """
+
+    def __init__(self, backend, model_path, backend_name="auto", threads=0, imgsz=320, crop=True,
+                 watch=True, poll=2.0, warmup_runs=2, roi=None):
+        # (代数, 后端, 类别表) 一起替换，引擎读到的总是一致的一组
+        self.current = (0, backend, None)
+        self.model_path = str(model_path)
+        self.backend_name = backend_name
+        self.threads = threads
+        self.imgsz = imgsz
+        self.crop = crop
+        self.roi = roi
+        self.watch = watch
+        self.poll = poll
+        self.warmup_runs = warmup_runs
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.load_time = 0.0  # 最近一次后台加载 + 预热的耗时（秒）
+        self.max_pause = 0.0  # 检测循环因切换模型停顿的最长时间（秒）
+        self._requested = threading.Event()
+        self._stop = threading.Event()
+        self._next_path = None
+        self._stamp = self._file_stamp(self.model_path)
+        self._thread = None
+
+    @property
+    def generation(self):
+        """每换一次模型加一，引擎据此判断是否需要切换"""
+        return self.current[0]
+
+    @property
+    def backend(self):
+        return self.current[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="model-reload", daemon=True)
+        self._thread.start()
+        return self
+
+    def request(self, model_path=None):
+        """请求重新加载（可换成另一个路径），加载在后台线程进行，立即返回"""
+        self._next_path = str(model_path) if model_path else None
+        self._requested.set()
+
+    def install_signal(self):
+        """收到 SIGHUP 时重新加载（只在主线程、非 Windows 上有效）"""
+        import signal
+
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.request())
+
+    @staticmethod
+    def _file_stamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _loop(self):
+        pending = None  # 检测到变化、等待文件写完的 stamp
+        while not self._stop.is_set():
+            if self._requested.wait(self.poll):
+                self._requested.clear()
+                if self._stop.is_set():
+                    break
+                path, self._next_path = self._next_path or self.model_path, None
+                self.reload(path)
+                continue
+            if not self.watch:
+                continue
+            stamp = self._file_stamp(self.model_path)
+            if stamp is None or stamp == self._stamp:
+                pending = None
+            elif stamp != pending:
+                pending = stamp
+            else:
+                pending = None
+                self.reload(self.model_path)
+
+    def reload(self, path):
+        """加载并预热 path，成功时成为新一代模型，返回是否成功"""
+        print(f"开始在后台加载模型: {path}")
+        stamp = self._file_stamp(path)
+        t0 = perf_counter()
+        try:
+            backend = load_backend(path, self.backend_name, threads=self.threads)
+            self._warmup(backend)
+            table = DetectionEngine._build_table(backend)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            if path == self.model_path:
+                # 同一个坏文件不再反复尝试，等它再次被修改
+                self._stamp = stamp
+            print(f"新模型加载或预热失败，继续使用原模型: {self.last_error}")
+            return False
+        self.load_time = perf_counter() - t0
+        self.model_path = path
+        self._stamp = stamp
+        self.reloads += 1
+        self.current = (self.generation + 1, backend, table)
+        print(f"新模型已就绪: {path}（后台加载 + 预热 {self.load_time:.2f}s），下一帧切换")
+        return True
+
+    def _warmup(self, backend):
+        """用全零图像跑几次推理并检查输出格式，失败时抛出异常"""
+        size = self.imgsz or 640
+        preprocessor = Preprocessor(self.crop, self.imgsz, slots=1, roi=self.roi)
+        image = preprocessor(np.zeros((size, size, 3), dtype=np.uint8))
+        fused = bool(self.imgsz) and hasattr(backend, "predict_blob") and backend.supports_blob(size)
+        for _ in range(max(self.warmup_runs, 1)):
+            if fused:
+                raw = backend.predict_blob(preprocessor.to_blob(image), 0.5)
+            else:
+                raw = backend.predict(image, 0.5)
+        boxes, scores, classes = raw
+        if np.asarray(boxes).reshape(-1, 4).shape[0] != len(scores) or len(scores) != len(classes):
+            raise ValueError("模型输出的框、分数、类别数量不一致")
+
+    def apply(self, engine):
+        """在两帧之间把 engine 切换到最新一代模型，由 DetectionEngine.process 调用"""
+        t0 = perf_counter()
+        engine.model_generation, backend, table = self.current
+        engine.set_backend(backend, table)
+        pause = perf_counter() - t0
+        self.max_pause = max(self.max_pause, pause)
+        print(f"已切换到新模型，检测循环停顿 {pause * 1000:.2f}ms")
+
+    def stats(self):
+        line = (f"模型热更新: 第 {self.generation} 代, 成功 {self.reloads} 次, 失败回滚 {self.failures} 次, "
+                f"最长停顿 {self.max_pause * 1000:.2f}ms")
+        if self.reloads:
+            line += f", 最近一次后台加载 {self.load_time:.2f}s"
+        return line
+
+    def close(self):
+        self._stop.set()
+        self._requested.set()
@@ -0,0 +1,99 @@
+"""
+检测守护进程的 socket 协议，本机用 Unix socket，跨机器用 TCP。
+
+每条消息: 4 字节大端头长度 + JSON 头 + 二进制负载（长度由头里的 size 给出）。
+图像负载可以是原始 BGR 像素（本机，零编码开销）或 JPEG（网络带宽有限时）。
+"""
+import json
+import socket
+import struct
+
+import cv2
+import numpy as np
+
+DEFAULT_SOCKET = "/tmp/trash_detector.sock"
+ENCODINGS = ("raw", "jpeg")
+
+_HEADER = struct.Struct(">I")
+
+
+def parse_address(address):
+    """'host:port' 为 TCP，其余视为 Unix socket 路径"""
+    address = str(address)
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return socket.AF_INET, (host or "0.0.0.0", int(port))
+    return socket.AF_UNIX, address
+
+
+def connect(address, timeout=None):
+    family, addr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(addr)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if not n:
+            raise ConnectionError("连接已关闭")
+        received += n
+    return buf
+
+
+def send_message(sock, header, payload=b""):
+    header = dict(header, size=len(payload))
+    data = json.dumps(header, ensure_ascii=False).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_message(sock):
+    """返回 (header, payload)，对方关闭连接时抛出 ConnectionError"""
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(bytes(_recv_exact(sock, length)))
+    size = header.get("size", 0)
+    payload = _recv_exact(sock, size) if size else b""
+    return header, payload
+
+
+def encode_image(frame, encoding="raw", quality=85):
+    """返回 (头字段, 负载)"""
+    if encoding == "jpeg":
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("JPEG 编码失败")
+        return {"encoding": "jpeg"}, buf.tobytes()
+    frame = np.ascontiguousarray(frame)
+    return {"encoding": "raw", "shape": list(frame.shape)}, frame.reshape(-1).data
+
+
+def decode_image(header, payload):
+    if header.get("encoding") == "jpeg":
+        return cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+    return np.frombuffer(payload, np.uint8).reshape(header["shape"])
+
+
+def raw_to_lists(raw):
+    boxes, scores, classes = raw
+    return {"boxes": np.asarray(boxes).round(1).tolist(),
+            "scores": np.asarray(scores).round(4).tolist(),
+            "classes": np.asarray(classes).tolist()}
+
+
+def lists_to_raw(header):
+    return (np.asarray(header["boxes"], dtype=np.float32).reshape(-1, 4),
+            np.asarray(header["scores"], dtype=np.float32),
+            np.asarray(header["classes"], dtype=np.int64))
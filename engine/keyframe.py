@@ -0,0 +1,152 @@
+import cv2
+import numpy as np
+
+from .timing import FpsCounter
+
+
+class FlowBoxTracker:
+    """
+    用金字塔 LK 光流在缩小的灰度图上跟踪检测框。
+
+    每个框内取若干角点，做前向和反向光流，前后误差小的点才算跟踪成功，
+    框按成功点的位移中值平移，置信度为成功点占比。
+
+    Args:
+        scale (float): 跟踪前的缩放比例
+        max_points (int): 每个框最多取的角点数
+        fb_thresh (float): 前后向误差阈值（缩放后的像素）
+        min_points (int): 少于该数量的成功点时认为跟丢
+    """
+
+    def __init__(self, scale=0.5, max_points=30, fb_thresh=1.0, min_points=3):
+        self.scale = scale
+        self.max_points = max_points
+        self.fb_thresh = fb_thresh
+        self.min_points = min_points
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self._prev = None
+        self._boxes = np.zeros((0, 4), np.float32)
+        self._points = []
+
+    def _gray(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return gray
+
+    def init(self, frame, boxes):
+        """在关键帧上重新选取每个框内的角点"""
+        gray = self._gray(frame)
+        self._prev = gray
+        self._boxes = np.asarray(boxes, dtype=np.float32).copy()
+        self._points = []
+        h, w = gray.shape
+        for box in self._boxes * self.scale:
+            x1, y1, x2, y2 = np.clip(box, 0, [w, h, w, h]).astype(int)
+            mask = np.zeros_like(gray)
+            mask[y1:y2, x1:x2] = 255
+            points = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 3, mask=mask)
+            self._points.append(points if points is not None else np.zeros((0, 1, 2), np.float32))
+
+    def update(self, frame):
+        """
+        跟踪到新的一帧
+
+        Returns:
+            boxes (N, 4), confidences (N,)，跟丢的框置信度为 0
+        """
+        gray = self._gray(frame)
+        n = len(self._boxes)
+        confidences = np.zeros(n, np.float32)
+        counts = [len(p) for p in self._points]
+        if n == 0 or sum(counts) == 0:
+            self._prev = gray
+            return self._boxes.copy(), confidences
+
+        points = np.concatenate(self._points).astype(np.float32)
+        nxt, status, _ = cv2.calcOpticalFlowPyrLK(self._prev, gray, points, None, **self.lk_params)
+        back, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev, nxt, None, **self.lk_params)
+        fb_err = np.linalg.norm((points - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb_err < self.fb_thresh)
+
+        start = 0
+        new_points = []
+        for i, count in enumerate(counts):
+            sel = slice(start, start + count)
+            start += count
+            ok = good[sel]
+            if ok.sum() >= self.min_points:
+                shift = np.median((nxt[sel][ok] - points[sel][ok]).reshape(-1, 2), axis=0) / self.scale
+                self._boxes[i] += np.tile(shift, 2)
+                confidences[i] = ok.mean()
+                new_points.append(nxt[sel][ok])
+            else:
+                new_points.append(np.zeros((0, 1, 2), np.float32))
+        self._points = new_points
+        self._prev = gray
+        return self._boxes.copy(), confidences
+
+
+class KeyframeScheduler:
+    """
+    关键帧调度：只在关键帧上运行检测器，中间帧用光流把框带过去。
+
+    满足以下任一条件时重新检测：上一关键帧没有检测到物体、距离上一关键帧已满 interval 帧、
+    跟踪置信度低于 min_confidence（此时在同一帧上立即检测）。
+
+    Args:
+        interval (int): 两次检测之间最多的帧数
+        min_confidence (float): 跟踪置信度下限
+        tracker: 框跟踪器，默认 FlowBoxTracker
+    """
+
+    def __init__(self, interval=3, min_confidence=0.5, tracker=None):
+        self.interval = interval
+        self.min_confidence = min_confidence
+        self.tracker = tracker or FlowBoxTracker()
+        self._raw = None
+        self._since = 0
+        self.frames = 0
+        self.detections = 0
+        self.frame_fps = FpsCounter()
+        self.detect_fps = FpsCounter()
+
+    def _detect(self, frame, detect):
+        raw = detect(frame)
+        self.tracker.init(frame, raw[0])
+        self._raw = raw
+        self._since = 0
+        self.detections += 1
+        self.detect_fps.tick()
+        return raw
+
+    def process(self, frame, detect):
+        """
+        Args:
+            frame: 预处理后的图像
+            detect: 检测函数，frame -> (boxes, scores, classes)
+
+        Returns:
+            (boxes, scores, classes), 本帧是否运行了检测器
+        """
+        self.frames += 1
+        self.frame_fps.tick()
+        if self._raw is None or not len(self._raw[0]) or self._since + 1 >= self.interval:
+            return self._detect(frame, detect), True
+
+        boxes, confidences = self.tracker.update(frame)
+        if confidences.min() < self.min_confidence:
+            return self._detect(frame, detect), True
+
+        self._since += 1
+        _, scores, classes = self._raw
+        return (boxes, scores, classes), False
+
+    @property
+    def detect_ratio(self):
+        return self.detections / self.frames if self.frames else 0.0
+
+    def stats(self):
+        return (f"关键帧调度: 检测 {self.detections}/{self.frames} 帧 ({self.detect_ratio:.0%}), "
+                f"检测器 {self.detect_fps.fps:.1f} FPS / 显示 {self.frame_fps.fps:.1f} FPS")
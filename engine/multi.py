@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .queues import DropOldestQueue
+from .timing import FpsCounter
+
+
+class BinStream:
+    """
+    一路摄像头 + 一个垃圾桶：有自己的采集线程、去抖状态和串口输出，
+    推理由 MultiStreamService 统一批量完成。
+
+    Args:
+        name (str): 名称，用于打印
+        engine: DetectionEngine，只使用它的 source/sinks/预处理/后处理/去抖，不调用它的后端
+        window (int): 计算延迟分位数的最近帧数
+    """
+
+    def __init__(self, name, engine, window=500):
+        self.name = name
+        self.engine = engine
+        self.frames = DropOldestQueue(maxsize=1)
+        self.fps = FpsCounter()
+        self.latencies = deque(maxlen=window)
+        self.finished = False
+        self._thread = threading.Thread(target=self._capture_loop, name=f"capture-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _capture_loop(self):
+        while True:
+            frame = self.engine.decode()
+            if frame is None:
+                break
+            self.frames.put((time.perf_counter(), frame))
+        self.finished = True
+
+    def latency_percentile(self, q):
+        return float(np.percentile(self.latencies, q)) * 1000 if self.latencies else 0.0
+
+
+class MultiStreamService:
+    """
+    一个进程服务多个垃圾桶：每个 tick 收集各路的最新一帧，
+    合成一次批量推理，再把结果分发回各路做去抖和串口输出。
+
+    各路摄像头的帧不是同时到达的：拿到第一帧后最多再等 batch_wait 秒，
+    让其它路的帧赶上同一个 batch，否则几乎每个 batch 都只有一帧。
+    预处理好的图像直接拼成 blob 推理（predict_blob_batch），不再让后端重新 letterbox。
+
+    Args:
+        backend: 共享的推理后端，需要支持 predict_batch
+        streams: BinStream 列表
+        conf (float): 置信度阈值
+        stats_interval (float): 打印统计的间隔（秒）
+        batch_wait (float): 凑 batch 最多等待的时间（秒），0 表示只取已经到达的帧
+    """
+
+    def __init__(self, backend, streams, conf=0.7, stats_interval=2.0, batch_wait=0.01):
+        for stream in streams:
+            # 批量推理直接调用后端，不经过 DetectionEngine.infer
+            if stream.engine.scheduler is not None:
+                raise ValueError("多路批量推理不支持关键帧跟踪")
+            if stream.engine.cascade is not None:
+                raise ValueError("多路批量推理不支持级联推理")
+        self.backend = backend
+        self.streams = list(streams)
+        self.conf = conf
+        self.stats_interval = stats_interval
+        self.batch_wait = batch_wait
+        self.batches = 0
+        self.full_batches = 0  # 每一路都有帧的 batch 数
+        self.batched_frames = 0
+        self.batch_seconds = 0.0
+        self._started_at = None
+
+    def _take(self, stream, timeout, pending):
+        """取 stream 的一帧：需要推理的放进 pending，被门控跳过的直接输出；没有帧时返回 False"""
+        item = stream.frames.get(timeout=timeout)
+        if item is None:
+            return False
+        captured_at, frame = item
+        engine = stream.engine
+        engine.sync_model()
+        frame = engine.preprocess(frame)
+        if engine.passes_gates(frame):
+            pending.append((stream, captured_at, frame))
+        else:
+            engine.emit(engine.skip(frame, captured_at))
+        return True
+
+    def _infer(self, pending):
+        frames = [frame for _, _, frame in pending]
+        engines = [stream.engine for stream, _, _ in pending]
+        if hasattr(self.backend, "predict_blob_batch") \
+                and all(e.fused and e.preprocessor.owns(f) for e, f in zip(engines, frames)):
+            # 每路的预处理器各有自己的 blob，拼起来就是批量输入
+            blob = np.concatenate([e.preprocessor.to_blob(f) for e, f in zip(engines, frames)])
+            return self.backend.predict_blob_batch(blob, self.conf)
+        return self.backend.predict_batch(frames, self.conf)
+
+    def tick(self):
+        """处理一个 batch，返回本次处理的帧数"""
+        pending = []
+        missing = []
+        taken = 0
+        for stream in self.streams:
+            if self._take(stream, 0, pending):
+                taken += 1
+            elif not stream.finished:
+                missing.append(stream)
+        if not taken:
+            return 0
+        # 已经拿到至少一路的帧，在截止时间前等其它路
+        deadline = time.perf_counter() + self.batch_wait
+        while missing:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._take(missing[0], remaining, pending):
+                break
+            missing.pop(0)
+        if not pending:
+            return 0
+        if not missing:
+            self.full_batches += 1
+
+        # 热更新后各路引擎已换上同一个新后端
+        self.backend = pending[0][0].engine.backend
+        t0 = time.perf_counter()
+        raws = self._infer(pending)
+        elapsed = time.perf_counter() - t0
+        self.batches += 1
+        self.batched_frames += len(pending)
+        self.batch_seconds += elapsed
+
+        for (stream, captured_at, frame), raw in zip(pending, raws):
+            engine = stream.engine
+            engine.timer.add("infer", elapsed)
+            result = engine.complete(frame, raw, captured_at)
+            for decision in result.decisions:
+                print(f"[{stream.name}] {decision.label}, {decision.trash_type}")
+                engine.emit_decision(decision)
+            engine.emit_frame(result)
+            stream.latencies.append(time.perf_counter() - captured_at)
+            stream.fps.tick()
+        return len(pending)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        throughput = self.batched_frames / elapsed if elapsed else 0.0
+        mean_batch = self.batched_frames / self.batches if self.batches else 0.0
+        mean_infer = self.batch_seconds / self.batches * 1000 if self.batches else 0.0
+        full = self.full_batches / self.batches if self.batches else 0.0
+        lines = [f"批量推理: {throughput:.1f} 帧/秒, 平均 batch {mean_batch:.2f}/{len(self.streams)} "
+                 f"(凑满 {full:.0%}), "
+                 f"每个 batch {mean_infer:.1f}ms, 推理占用 {self.batch_seconds / elapsed if elapsed else 0:.0%}"]
+        for stream in self.streams:
+            lines.append(f"  [{stream.name}] {stream.fps.fps:.1f} FPS, 延迟 p50 {stream.latency_percentile(50):.0f}ms "
+                         f"p95 {stream.latency_percentile(95):.0f}ms, 丢帧 {stream.frames.dropped}")
+        return lines
+
+    def run(self):
+        for stream in self.streams:
+            stream.start()
+        self._started_at = time.perf_counter()
+        last_report = self._started_at
+        try:
+            while True:
+                if not self.tick():
+                    if all(s.finished and not s.frames.qsize() for s in self.streams):
+                        break
+                    time.sleep(0.001)
+                if any(s.engine.quit_requested for s in self.streams):
+                    break
+                now = time.perf_counter()
+                if self.stats_interval and now - last_report >= self.stats_interval:
+                    last_report = now
+                    print("\n".join(self.stats()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print("\n".join(self.stats()))
+            for stream in self.streams:
+                stream.engine.close()
@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+
+def letterbox(img, new_shape=(320, 320), color=(114, 114, 114)):
+    """
+    等比缩放并填充到 new_shape，与 ultralytics 的 LetterBox(auto=False) 一致
+
+    Returns:
+        img: 填充后的图像
+        ratio (float): 缩放比例
+        pad (tuple): 左、上方向的填充像素 (left, top)
+    """
+    h, w = img.shape[:2]
+    new_h, new_w = new_shape
+    r = min(new_h / h, new_w / w)
+    unpad_w, unpad_h = int(round(w * r)), int(round(h * r))
+    dw, dh = (new_w - unpad_w) / 2, (new_h - unpad_h) / 2
+
+    if (w, h) != (unpad_w, unpad_h):
+        img = cv2.resize(img, (unpad_w, unpad_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    if top or bottom or left or right:
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return img, r, (left, top)
+
+
+def to_blob(img):
+    """BGR HWC uint8 -> RGB NCHW float32 [0, 1]"""
+    blob = img[:, :, ::-1].transpose(2, 0, 1)
+    blob = np.ascontiguousarray(blob, dtype=np.float32)
+    blob *= 1.0 / 255.0
+    return blob[None]
+
+
+def xywh2xyxy(boxes):
+    out = np.empty_like(boxes)
+    half_w = boxes[:, 2] / 2
+    half_h = boxes[:, 3] / 2
+    out[:, 0] = boxes[:, 0] - half_w
+    out[:, 1] = boxes[:, 1] - half_h
+    out[:, 2] = boxes[:, 0] + half_w
+    out[:, 3] = boxes[:, 1] + half_h
+    return out
+
+
+def box_iou(box, boxes):
+    """一个框与多个框的 IoU"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / (area + areas - inter + 1e-9)
+
+
+def box_iou_matrix(a, b):
+    """两组框两两之间的 IoU，返回 (len(a), len(b))"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def nms(boxes, scores, iou_thres=0.7):
+    """贪心 NMS，返回保留下来的下标（按分数降序）"""
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if order.size == 1:
+            break
+        ious = box_iou(boxes[i], boxes[order[1:]])
+        order = order[1:][ious <= iou_thres]
+    return np.array(keep, dtype=np.int64)
+
+
+def yolo_postprocess(output, conf=0.25, iou=0.7, max_det=300, max_wh=7680):
+    """
+    解析 YOLOv8/11 检测头输出 (1, 4 + nc, N)，做置信度过滤和按类别的 NMS，
+    参数与 ultralytics 的 non_max_suppression 默认值一致
+
+    Returns:
+        boxes (N, 4) xyxy, scores (N,), classes (N,)，坐标在网络输入尺度上
+    """
+    pred = output[0].T  # (N, 4 + nc)
+    class_scores = pred[:, 4:]
+    classes = class_scores.argmax(1)
+    scores = class_scores[np.arange(len(classes)), classes]
+    mask = scores > conf
+    if not mask.any():
+        return (np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64))
+    boxes = xywh2xyxy(pred[mask, :4])
+    scores = scores[mask]
+    classes = classes[mask]
+    # 按类别偏移坐标，使不同类别的框互不抑制
+    keep = nms(boxes + classes[:, None] * max_wh, scores, iou)[:max_det]
+    return boxes[keep], scores[keep], classes[keep]
+
+
+def scale_boxes(boxes, ratio, pad, orig_shape):
+    """把网络输入尺度上的框映射回原图并裁剪到边界内"""
+    boxes = boxes.copy()
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= ratio
+    h, w = orig_shape[:2]
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+    return boxes
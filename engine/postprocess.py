@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .config import TRASH_CATEGORY_IDS, UNKNOWN_CATEGORY, classify_trash, load_class_names
+
+
+@dataclass
+class Detection:
+    """单个检测框，只在需要逐个访问时才从 Detections 中取出"""
+    cls_id: int
+    score: float
+    label: str
+    trash_type: str
+    category_id: int
+    xyxy: tuple
+
+
+class ClassTable:
+    """
+    类别查找表：cls_id -> 名称 / 垃圾分类 / 分类编号，启动时只建一次，
+    之后按数组下标查表，代替每个框都线性扫描一遍分类列表。
+    """
+
+    def __init__(self, names=None):
+        if names is None:
+            names = load_class_names()
+        if isinstance(names, dict):
+            names = [names[i] for i in sorted(names)]
+        self.labels = np.array(names, dtype=object)
+        self.trash_types = np.array([classify_trash(n) for n in names], dtype=object)
+        self.category_ids = np.array([TRASH_CATEGORY_IDS.get(t, 0) for t in self.trash_types],
+                                     dtype=np.int64)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def trash_type(self, cls_id):
+        return self.trash_types[cls_id] if 0 <= cls_id < len(self) else UNKNOWN_CATEGORY
+
+    def category_id(self, cls_id):
+        return int(self.category_ids[cls_id]) if 0 <= cls_id < len(self) else 0
+
+
+class Detections:
+    """
+    一帧的检测结果，按列存成 numpy 数组
+
+    Attributes:
+        boxes (N, 4) xyxy, scores (N,), classes (N,), category_ids (N,)
+    """
+
+    def __init__(self, boxes, scores, classes, table):
+        self.boxes = boxes
+        self.scores = scores
+        self.classes = classes
+        self.table = table
+        self.category_ids = table.category_ids[classes] if len(classes) else np.zeros(0, np.int64)
+
+    @classmethod
+    def empty(cls, table):
+        return cls(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64), table)
+
+    @classmethod
+    def from_raw(cls, raw, table, conf=0.0):
+        """把后端输出的 (boxes, scores, classes) 一次性转换并按置信度过滤"""
+        boxes, scores, classes = raw
+        classes = np.asarray(classes, dtype=np.int64)
+        # 超出查找表范围的类别当作未知，不参与分类
+        mask = (scores >= conf) & (classes >= 0) & (classes < len(table))
+        if not mask.all():
+            boxes, scores, classes = boxes[mask], scores[mask], classes[mask]
+        return cls(boxes, scores, classes, table)
+
+    def __len__(self):
+        return len(self.classes)
+
+    @property
+    def labels(self):
+        return self.table.labels[self.classes]
+
+    @property
+    def raw(self):
+        return self.boxes, self.scores, self.classes
+
+    def select(self, index):
+        """按布尔掩码或下标取子集"""
+        return Detections(self.boxes[index], self.scores[index], self.classes[index], self.table)
+
+    def get(self, i):
+        cls_id = int(self.classes[i])
+        return Detection(
+            cls_id=cls_id,
+            score=float(self.scores[i]),
+            label=self.table.labels[cls_id],
+            trash_type=self.table.trash_types[cls_id],
+            category_id=int(self.category_ids[i]),
+            xyxy=tuple(self.boxes[i].tolist()),
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.get(i)
@@ -0,0 +1,97 @@
+import cv2
+import numpy as np
+
+from .roi import roi_pixels
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+class Preprocessor:
+    """
+    裁切 + 缩放 + BGR->RGB + 归一化，全部写进预先分配好的缓冲区，每帧不再分配新数组。
+
+    裁切只是切片（不拷贝），cv2.resize 直接写进环形缓冲里的一张图；需要推理时
+    再把这张图拆成 RGB 平面、除以 255 写进输入 blob，被门控跳过的帧不做这一步。
+
+    预处理后的图像会被之后的帧覆盖：同一时刻最多 slots 张图有效。需要保留画面的
+    地方（录像队列、预录缓冲）自己拷贝，多线程流水线按显示队列深度调大 slots。
+
+    Args:
+        crop (bool): 是否把画面中心裁切成正方形
+        imgsz (int): 缩放后的边长，None/0 表示不缩放（此时不使用缓冲区）
+        slots (int): 环形缓冲的图像数
+        roi: 裁切后再只取这块区域 (x0, y0, x1, y1)（归一化，见 engine.roi），None 表示整个画面
+    """
+
+    def __init__(self, crop=True, imgsz=320, slots=2, roi=None):
+        self.crop = crop
+        self.imgsz = imgsz or None
+        self.roi = roi
+        self._roi_cache = (None, None)  # (画面尺寸, 像素区域)
+        self._images = []
+        self._next = 0
+        self.source = None  # 最近一帧缩放前的画面（裁切后的视图，不拷贝）
+        self.blob = None
+        if self.imgsz:
+            self.reserve(slots)
+            # NCHW float32，与 ultralytics/onnx 的输入一致
+            self.blob = np.empty((1, 3, self.imgsz, self.imgsz), dtype=np.float32)
+            self._planes = [np.empty((self.imgsz, self.imgsz), dtype=np.uint8) for _ in range(3)]
+
+    def reserve(self, slots):
+        """保证环形缓冲至少有 slots 张图"""
+        if not self.imgsz:
+            return
+        while len(self._images) < slots:
+            self._images.append(np.empty((self.imgsz, self.imgsz, 3), dtype=np.uint8))
+
+    @property
+    def slots(self):
+        return len(self._images)
+
+    def __call__(self, frame, out=None):
+        """
+        Args:
+            out: 指定写入的图像（如共享内存里的槽位），None 时使用自己的环形缓冲
+        """
+        if self.crop:
+            # 裁切画面中心的正方形，640x480 时即 frame[:, 80:560]
+            h, w = frame.shape[:2]
+            if w > h:
+                x0 = (w - h) // 2
+                frame = frame[:, x0:x0 + h]
+        if self.roi is not None:
+            frame = self._cut_roi(frame)
+        self.source = frame
+        if not self.imgsz:
+            return frame
+        if out is None:
+            out = self._images[self._next]
+            self._next = (self._next + 1) % len(self._images)
+        cv2.resize(frame, (self.imgsz, self.imgsz), dst=out, interpolation=cv2.INTER_LINEAR)
+        return out
+
+    def _cut_roi(self, frame):
+        h, w = frame.shape[:2]
+        shape, box = self._roi_cache
+        if shape != (h, w):
+            box = roi_pixels(self.roi, w, h)
+            self._roi_cache = ((h, w), box)
+        x0, y0, side = box
+        return frame[y0:y0 + side, x0:x0 + side]
+
+    def to_blob(self, image):
+        """
+        BGR HWC uint8 -> RGB NCHW float32 [0, 1]，写进 self.blob 并返回它
+
+        cv2.split 把交错的 BGR 拆成三个连续平面（比按步长读取转置视图快），
+        再按 RGB 顺序各用一次 np.multiply 完成类型转换和归一化
+        """
+        cv2.split(image, self._planes)
+        for channel, plane in zip(self.blob[0], reversed(self._planes)):
+            np.multiply(plane, _SCALE, out=channel, dtype=np.float32)
+        return self.blob
+
+    def owns(self, image):
+        """image 是否是本预处理器缓冲区里的图像（即尺寸与 blob 对应）"""
+        return any(image is buf for buf in self._images)
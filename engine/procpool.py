@@ -0,0 +1,245 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .backends import PlaceholderBackend, load_backend
+from .preprocess import Preprocessor
+from .remote import RemoteBackend
+from .timing import FpsCounter
+
+perf_counter = time.perf_counter
+
+
+class SharedFrameRing:
+    """
+    multiprocessing.shared_memory 上的定长图像环，主进程按槽位写入，
+    worker 进程按槽位号直接读取，帧不经过管道也不拷贝。
+
+    Args:
+        slots (int): 槽位数
+        shape (tuple): 每张图像的形状 (h, w, 3)
+        name (str): 已有共享内存的名字，None 表示新建（主进程）
+    """
+
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        size = slots * int(np.prod(self.shape))
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # spawn 出来的 worker 与主进程共用一个 resource_tracker，按名字打开时的重复注册
+            # 不会导致内存被提前删除，由主进程 unlink 时统一注销
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __getitem__(self, slot):
+        return self.array[slot]
+
+    def close(self):
+        self.array = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # 还有别处引用着槽位里的图像，交给进程退出时回收
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker_main(ring_name, slots, shape, model_path, backend, conf, threads, tasks, results):
+    """worker 进程：加载自己的模型，按槽位号读取图像推理，把 (序号, 结果) 送回主进程"""
+    ring = SharedFrameRing(slots, shape, name=ring_name)
+    model = load_backend(model_path, backend, threads=threads)
+    preprocessor = Preprocessor(crop=False, imgsz=shape[0], slots=0)
+    fused = hasattr(model, "predict_blob") and model.supports_blob(shape[0])
+    results.put(("ready", os.getpid(), getattr(model, "names", None)))
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, slot = task
+        image = ring[slot]
+        t0 = perf_counter()
+        if fused:
+            raw = model.predict_blob(preprocessor.to_blob(image), conf)
+        else:
+            raw = model.predict(image, conf)
+        results.put((seq, raw, perf_counter() - t0))
+    ring.close()
+
+
+class ProcessPoolPipeline:
+    """
+    多进程推理：主进程读取、预处理（直接写进共享内存环）并做门控，
+    workers 个进程各自加载模型并行推理，绕开 GIL 用满所有核心。
+    结果按帧序号重新排好再交给去抖和输出，决策顺序与单进程完全相同。
+
+    所有槽位都在推理中时主进程暂停读取，摄像头（buffer=1）自然只保留最新一帧。
+
+    Args:
+        engine: DetectionEngine，提供来源、门控、去抖和输出；imgsz 必须设置。
+            它的后端不会被调用，可以用 PlaceholderBackend 避免主进程再加载一份模型
+        model_path: worker 加载的模型路径
+        backend (str): 推理后端，见 engine.backends
+        workers (int): worker 进程数
+        threads (int): 每个 worker 的推理线程数，0 表示 CPU 核数 / workers
+        slots (int): 共享内存槽位数，0 表示 workers * 2
+        stats_interval (float): 打印统计的间隔（秒），0 表示不打印
+    """
+
+    def __init__(self, engine, model_path, backend="auto", workers=4, threads=0, slots=0,
+                 stats_interval=0.0):
+        if not engine.imgsz:
+            raise ValueError("多进程模式需要固定的 imgsz")
+        if engine.scheduler is not None:
+            raise ValueError("多进程模式不支持关键帧跟踪，帧之间会并行推理")
+        if engine.reloader is not None:
+            raise ValueError("多进程模式不支持模型热更新，每个 worker 各自加载模型")
+        if engine.cascade is not None:
+            raise ValueError("多进程模式不支持级联推理，worker 只运行 --model")
+        if isinstance(engine.backend, RemoteBackend):
+            raise ValueError("多进程模式不支持远程推理，每个 worker 各自加载本地模型")
+        self.engine = engine
+        self.model_path = str(model_path)
+        self.backend = backend
+        self.workers = workers
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        self.slots = slots or workers * 2
+        self.stats_interval = stats_interval
+        self.ring = None
+        self.fps = FpsCounter()
+        self.elapsed = 0.0  # 不含 worker 启动的运行时间
+        self.reordered = 0  # 到达时前面还有帧没完成、需要等待的结果数
+
+    def _start(self):
+        # spawn 而不是 fork：onnxruntime/torch 的线程池在 fork 之后不可用
+        ctx = mp.get_context("spawn")
+        size = self.engine.imgsz
+        self.ring = SharedFrameRing(self.slots, (size, size, 3))
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        self.processes = [
+            ctx.Process(target=_worker_main, name=f"infer-{i}", daemon=True,
+                        args=(self.ring.name, self.slots, self.ring.shape, self.model_path,
+                              self.backend, self.engine.conf, self.threads, self.tasks, self.results))
+            for i in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+        names = [self._get(timeout=120)[2] for _ in self.processes][0]
+        if isinstance(self.engine.backend, PlaceholderBackend) and names:
+            # 主进程没有加载模型，类别表按 worker 报告的模型类别名重建
+            self.engine.set_backend(PlaceholderBackend(self.model_path, names))
+        print(f"多进程推理: {self.workers} 个 worker, 每个 {self.threads} 线程, {self.slots} 个共享槽位")
+
+    def _get(self, timeout):
+        """从结果队列取一项，所有 worker 都退出时报错"""
+        while True:
+            try:
+                return self.results.get(timeout=min(timeout, 1.0))
+            except queue.Empty:
+                timeout -= 1.0
+                if not any(p.is_alive() for p in self.processes):
+                    raise RuntimeError("所有推理进程都已退出")
+                if timeout <= 0:
+                    raise
+
+    def stats(self):
+        return (f"多进程: {self.workers} worker, {self.fps.fps:.1f} FPS, "
+                f"重排 {self.reordered} 帧")
+
+    def run(self):
+        engine = self.engine
+        self._start()
+        started = perf_counter()
+        free = deque(range(self.slots))
+        pending = {}   # 序号 -> (槽位, 采集时间, 推理结果)，None 表示被门控跳过
+        waiting = {}   # 已提交给 worker 的序号 -> (槽位, 采集时间)
+        next_seq = next_out = 0
+        exhausted = False
+        last_report = perf_counter()
+        try:
+            while not engine.quit_requested:
+                # 有空槽位就继续读帧，预处理直接写进共享内存
+                while free and not exhausted:
+                    frame = engine.decode()
+                    if frame is None:
+                        exhausted = True
+                        break
+                    captured_at = engine.source.captured_at or perf_counter()
+                    slot = free.popleft()
+                    t0 = perf_counter()
+                    image = engine.preprocessor(frame, out=self.ring[slot])
+                    engine.timer.add("preprocess", perf_counter() - t0)
+                    if engine.passes_gates(image):
+                        waiting[next_seq] = (slot, captured_at)
+                        self.tasks.put((next_seq, slot))
+                    else:
+                        pending[next_seq] = (slot, captured_at, None)
+                    next_seq += 1
+
+                if exhausted and next_out == next_seq:
+                    break
+
+                # 没有空槽位或已读完时阻塞等待结果，否则只取已经到达的
+                if next_out not in pending:
+                    try:
+                        if free and not exhausted:
+                            seq, raw, infer_s = self.results.get_nowait()
+                        else:
+                            seq, raw, infer_s = self._get(timeout=30)
+                    except queue.Empty:
+                        continue
+                    slot, captured_at = waiting.pop(seq)
+                    pending[seq] = (slot, captured_at, raw)
+                    engine.timer.add("infer", infer_s)
+                    if seq != next_out:
+                        self.reordered += 1
+
+                # 按序号输出，保证去抖看到的帧顺序与采集顺序一致
+                while next_out in pending:
+                    slot, captured_at, raw = pending.pop(next_out)
+                    image = self.ring[slot]
+                    if raw is None:
+                        result = engine.skip(image, captured_at)
+                    else:
+                        result = engine.complete(image, raw, captured_at)
+                    engine.emit(result)
+                    free.append(slot)
+                    next_out += 1
+                    self.fps.tick()
+
+                now = perf_counter()
+                if self.stats_interval and now - last_report >= self.stats_interval:
+                    last_report = now
+                    print(self.stats())
+                    engine.report(force=True)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.elapsed = perf_counter() - started
+            self.close()
+
+    def close(self):
+        if self.ring is None:
+            return
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.engine.close()
+        self.ring.close()
+        self.ring = None
@@ -0,0 +1,237 @@
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import cv2
+
+from .draw import Overlay
+from .sinks import Sink
+
+
+class BackgroundEncoder:
+    """
+    后台编码线程：推理循环只把 (画面, 检测结果) 放进有界队列，
+    绘制和 mp4 编码都在这个线程里做。队列满时丢帧而不是阻塞推理。
+
+    每个片段超过 max_seconds 或 max_mb 时自动切到下一个文件；
+    输出目录总大小超过 max_total_mb 时删除最旧的文件。existing 是之前运行留下的文件，
+    同样计入配额，否则每次重启后旧文件都不会被删除。
+    """
+
+    def __init__(self, fps=30.0, fourcc='mp4v', queue_size=64, max_seconds=60.0, max_mb=50.0,
+                 max_total_mb=0.0, names=None, existing=()):
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.max_frames = int(max_seconds * fps) if max_seconds else 0
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else 0
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024) if max_total_mb else 0
+        self.overlay = Overlay(names)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._path = None
+        self._part = 0
+        self._frames_in_file = 0
+        self.dropped = 0
+        self.written = 0
+        self.files = sorted((f for f in existing if f.is_file()), key=lambda f: f.stat().st_mtime)
+        self._enforce_total()
+        self._thread = threading.Thread(target=self._run, name="encoder", daemon=True)
+        self._thread.start()
+
+    # ---- 推理线程调用，全部非阻塞 ----
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def open(self, path):
+        """开始一个新文件（前一个文件会被关闭）"""
+        self._put(("open", Path(path)))
+
+    def write(self, frame, raw=None, copy=True):
+        """
+        Args:
+            copy (bool): 是否拷贝画面。预处理后的画面在预分配缓冲区里，
+                会被之后的帧覆盖，放进队列前必须拷贝；已经拷贝过的传 False
+        """
+        self._put(("frame", frame.copy() if copy else frame, raw))
+
+    def close_file(self):
+        self._put(("close",))
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    # ---- 编码线程 ----
+
+    def _release(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+            print(f"视频已保存到 {self.files[-1]}")
+            self._enforce_total()
+
+    def _enforce_total(self):
+        if not self.max_total_bytes:
+            return
+        existing = [f for f in self.files if f.exists()]
+        total = sum(f.stat().st_size for f in existing)
+        while existing and total > self.max_total_bytes:
+            oldest = existing.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink()
+            print(f"磁盘配额已满，删除 {oldest}")
+        self.files = existing
+
+    def _open_writer(self, size):
+        path = self._path
+        if self._part:
+            path = path.with_name(f"{path.stem}_{self._part}{path.suffix}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = cv2.VideoWriter(str(path), self.fourcc, self.fps, size)
+        self._frames_in_file = 0
+        if path in self.files:
+            self.files.remove(path)  # 覆盖上次运行的同名文件
+        self.files.append(path)
+
+    def _rotate_if_needed(self):
+        if self._frames_in_file == 0:
+            return
+        too_long = self.max_frames and self._frames_in_file >= self.max_frames
+        too_big = self.max_bytes and self.files[-1].exists() and self.files[-1].stat().st_size >= self.max_bytes
+        if too_long or too_big:
+            self._writer.release()
+            self._writer = None
+            self._part += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            kind = item[0]
+            if kind == "stop":
+                self._release()
+                return
+            if kind == "open":
+                self._release()
+                self._path = item[1]
+                self._part = 0
+            elif kind == "close":
+                self._release()
+                self._path = None
+            elif kind == "frame" and self._path is not None:
+                _, frame, raw = item
+                self._rotate_if_needed()
+                frame = self.overlay.render(frame, raw)
+                if self._writer is None:
+                    h, w = frame.shape[:2]
+                    self._open_writer((w, h))
+                self._writer.write(frame)
+                self._frames_in_file += 1
+                self.written += 1
+
+    def stop(self, timeout=10.0):
+        """写完队列里剩下的帧后退出"""
+        self._queue.put(("stop",))
+        self._thread.join(timeout)
+
+
+class RecorderSink(Sink):
+    """连续录制所有帧，编码在后台线程完成，按时长或大小切分文件"""
+
+    def __init__(self, output_path="output.mp4", fps=30.0, fourcc='mp4v', names=None, **kwargs):
+        self.output_path = Path(output_path)
+        path = self.output_path
+        # 之前运行写下的同名文件和切分出的 name_1.mp4、name_2.mp4 ...
+        existing = [path] + [f for f in path.parent.glob(f"{path.stem}_*{path.suffix}")
+                             if f.stem[len(path.stem) + 1:].isdigit()]
+        self.encoder = BackgroundEncoder(fps=fps, fourcc=fourcc, names=names, existing=existing, **kwargs)
+        self.encoder.open(self.output_path)
+
+    def on_frame(self, result):
+        self.encoder.write(result.frame, result.detections.raw)
+
+    def stats(self):
+        return f"录像: 写入 {self.encoder.written} 帧, 丢弃 {self.encoder.dropped}, 队列 {self.encoder.qsize()}"
+
+    def close(self):
+        self.encoder.stop()
+
+
+class EventClipRecorder(Sink):
+    """
+    事件片段录像：平时只在内存里保留最近 pre_roll 秒的画面，
+    出现分拣决策或低置信度检测时，把这段预录和之后 post_roll 秒写成一个短片段。
+
+    Args:
+        output_dir: 片段保存目录
+        fps (float): 片段帧率，也用来换算预录帧数
+        pre_roll (float): 事件前保留的秒数
+        post_roll (float): 最后一次事件后继续录制的秒数
+        low_conf (float): 有检测框但最高分低于该值时也算事件，0 表示不记录低置信度事件
+        max_clip (float): 单个片段最长秒数，超过后切到下一个文件
+        max_total_mb (float): 片段目录的总大小上限，超过后删除最旧的片段
+    """
+
+    def __init__(self, output_dir="clips", fps=30.0, pre_roll=2.0, post_roll=2.0, low_conf=0.0,
+                 max_clip=20.0, max_total_mb=500.0, names=None):
+        self.output_dir = Path(output_dir)
+        self.pre_roll = deque(maxlen=max(1, int(pre_roll * fps)))
+        self.post_roll = post_roll
+        self.low_conf = low_conf
+        # 队列要能一次放下整段预录
+        existing = self.output_dir.glob("*.mp4") if self.output_dir.is_dir() else ()
+        self.encoder = BackgroundEncoder(fps=fps, queue_size=self.pre_roll.maxlen + 64,
+                                         max_seconds=max_clip, max_mb=0,
+                                         max_total_mb=max_total_mb, names=names, existing=existing)
+        self._pending_reason = None
+        self._recording = False
+        self._recording_until = 0.0
+        self.clips = 0
+        self.events = 0
+
+    def on_decision(self, decision):
+        self._pending_reason = decision.label
+
+    def on_frame(self, result):
+        now = time.monotonic()
+        reason, self._pending_reason = self._pending_reason, None
+        if reason is None and self.low_conf and len(result.detections) \
+                and result.detections.scores.max() < self.low_conf:
+            reason = "lowconf"
+
+        if reason is not None:
+            self.events += 1
+            if not self._recording:
+                self._start_clip(reason)
+            self._recording_until = now + self.post_roll
+
+        if self._recording:
+            if now < self._recording_until:
+                self.encoder.write(result.frame, result.detections.raw)
+                return
+            self.encoder.close_file()
+            self._recording = False
+        # 预录缓冲要保留几秒画面，不能引用会被覆盖的预处理缓冲区
+        self.pre_roll.append((result.frame.copy(), result.detections.raw))
+
+    def _start_clip(self, reason):
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.clips += 1
+        self.encoder.open(self.output_dir / f"{stamp}_{self.clips:04d}_{reason}.mp4")
+        for frame, raw in self.pre_roll:
+            self.encoder.write(frame, raw, copy=False)
+        self.pre_roll.clear()
+        self._recording = True
+
+    def stats(self):
+        return (f"事件录像: 片段 {self.clips}, 事件 {self.events}, 写入 {self.encoder.written} 帧, "
+                f"丢弃 {self.encoder.dropped}, 队列 {self.encoder.qsize()}")
+
+    def close(self):
+        self.encoder.stop()
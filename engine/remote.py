@@ -0,0 +1,221 @@
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .ipc import connect, encode_image, lists_to_raw, recv_message, send_message
+
+perf_counter = time.perf_counter
+
+
+class RemoteBackend:
+    """
+    把推理卸载到局域网里更强的机器：树莓派只负责采集、预处理和串口，
+    裁切缩放好的图像 JPEG 压缩后发给 DetectorDaemon（infer 命令），取回检测框。
+
+    与其它后端接口相同（predict 返回 boxes/scores/classes），可以直接交给 DetectionEngine。
+
+    - 每帧同步等待自己的回复（不做流水线），最多等 timeout 秒，超时的这一帧用本地模型推理，
+      迟到的回复丢弃
+    - 超时的请求在收到迟到的回复前仍算在途，最多保留 max_inflight 个；
+      在途已满（服务端跟不上）时这一帧不再发送，直接本地推理，并和超时一样计数
+    - 连续 max_timeouts 次超时（含在途已满）或连接断开时认为服务端不可用，
+      之后每 retry 秒重连一次，期间全部本地推理
+    - 本地模型在后台线程加载，不拖慢启动；还没加载完时回退的帧没有检测结果
+
+    Args:
+        address: 服务端 host:port（或本机的 Unix socket 路径）
+        fallback: 无参函数，返回本地推理后端（如 lambda: load_backend("models/trashcan.onnx")），
+            None 表示不回退
+        timeout (float): 每帧等待服务端回复的最长时间（秒）
+        max_inflight (int): 最多保留多少个超时未回的请求
+        quality (int): JPEG 质量
+        retry (float): 服务端不可用时重连的间隔（秒）
+        max_timeouts (int): 连续超时多少次后断开重连，不能大于 max_inflight，None 表示等于 max_inflight
+    """
+
+    def __init__(self, address, fallback=None, timeout=0.2, max_inflight=2, quality=85, retry=2.0,
+                 max_timeouts=None):
+        if max_timeouts is None:
+            max_timeouts = max_inflight
+        if not 1 <= max_timeouts <= max_inflight:
+            raise ValueError(f"max_timeouts ({max_timeouts}) 应在 1 到 max_inflight ({max_inflight}) 之间")
+        self.address = address
+        self.model_path = f"remote://{address}"
+        self.timeout = timeout
+        self.max_inflight = max_inflight
+        self.quality = quality
+        self.retry = retry
+        self.max_timeouts = max_timeouts
+        self.names = None
+        self.local = None
+        self.sock = None
+        self.pending = {}  # 序号 -> [Event, 回复]
+        self.lock = threading.Lock()
+        self.rtts = deque(maxlen=500)
+        self.remote_frames = 0
+        self.local_frames = 0
+        self.blind_frames = 0  # 需要回退但本地模型还没加载好的帧
+        self.timeouts = 0
+        self.busy = 0  # 在途已满而没有发送的帧
+        self.disconnects = 0
+        self._seq = 0
+        self._consecutive_timeouts = 0
+        self._last_attempt = 0.0
+        self._connecting = False
+        self._fallback = fallback
+
+        self._connect()
+        if fallback is not None:
+            if self.sock is None:
+                # 一开始就连不上服务端，只能等本地模型加载完
+                print(f"无法连接推理服务 {address}，使用本地模型")
+                self._load_fallback()
+            else:
+                threading.Thread(target=self._load_fallback, name="fallback-load", daemon=True).start()
+        if self.names is None and self.local is not None:
+            self.names = getattr(self.local, "names", None)
+
+    def _load_fallback(self):
+        t0 = perf_counter()
+        try:
+            self.local = self._fallback()
+        except Exception as e:
+            print(f"本地回退模型加载失败，服务端不可用时没有检测结果: {e}")
+            return
+        print(f"本地回退模型已加载 ({perf_counter() - t0:.1f}s)")
+
+    # ---- 连接 ----
+
+    def _connect(self):
+        self._last_attempt = time.monotonic()
+        try:
+            sock = connect(self.address, timeout=max(self.timeout, 1.0))
+            send_message(sock, {"cmd": "ping"})
+            info, _ = recv_message(sock)
+        except (OSError, ConnectionError, ValueError):
+            return False
+        # 回复由接收线程读取，阻塞读；服务端卡住时由超时计数断开连接
+        sock.settimeout(None)
+        if self.names is None:
+            self.names = info.get("names")
+        self.sock = sock
+        self._consecutive_timeouts = 0
+        threading.Thread(target=self._receive, args=(sock,), name="remote-recv", daemon=True).start()
+        print(f"已连接推理服务 {self.address}（模型 {info.get('model')}）")
+        return True
+
+    def _reconnect(self):
+        try:
+            self._connect()
+        finally:
+            self._connecting = False
+
+    def _receive(self, sock):
+        try:
+            while True:
+                reply, _ = recv_message(sock)
+                with self.lock:
+                    slot = self.pending.pop(reply.get("seq"), None)
+                if slot is not None:
+                    slot[1] = reply
+                    slot[0].set()
+        except (OSError, ConnectionError, ValueError):
+            self._disconnect(sock)
+
+    def _disconnect(self, sock):
+        with self.lock:
+            if self.sock is not sock:
+                return
+            self.sock = None
+            pending, self.pending = self.pending, {}
+        self.disconnects += 1
+        self._close_socket(sock)
+        for event, _ in pending.values():
+            event.set()
+        print(f"推理服务 {self.address} 不可用，改用本地模型，{self.retry:.0f}s 后重连")
+
+    # ---- 推理 ----
+
+    def predict(self, frame, conf):
+        sock = self.sock
+        if sock is None and not self._connecting and time.monotonic() - self._last_attempt >= self.retry:
+            # 连接一台不在线的主机可能要等很久，放到后台，不卡住检测循环
+            self._connecting = True
+            threading.Thread(target=self._reconnect, name="remote-connect", daemon=True).start()
+        if sock is not None:
+            if len(self.pending) >= self.max_inflight:
+                # 名额都被超时未回的请求占着，说明服务端仍然卡住，按超时计数，否则永远不会断开重连
+                self.busy += 1
+                self._count_timeout(sock)
+            else:
+                raw = self._predict_remote(sock, frame, conf)
+                if raw is not None:
+                    return raw
+        return self._predict_local(frame, conf)
+
+    def _predict_remote(self, sock, frame, conf):
+        """返回 raw，超时或失败时返回 None"""
+        fields, payload = encode_image(frame, "jpeg", self.quality)
+        slot = [threading.Event(), None]
+        with self.lock:
+            self._seq += 1
+            seq = self._seq
+            self.pending[seq] = slot
+        t0 = perf_counter()
+        try:
+            send_message(sock, dict(fields, cmd="infer", seq=seq, conf=conf), payload)
+        except OSError:
+            self._disconnect(sock)
+            return None
+        if not slot[0].wait(self.timeout):
+            # 请求仍在途，占着一个名额，直到迟到的回复到达或连接断开
+            self.timeouts += 1
+            self._count_timeout(sock)
+            return None
+        reply = slot[1]
+        if reply is None or not reply.get("ok"):
+            return None
+        self._consecutive_timeouts = 0
+        self.rtts.append(perf_counter() - t0)
+        self.remote_frames += 1
+        return lists_to_raw(reply)
+
+    def _count_timeout(self, sock):
+        self._consecutive_timeouts += 1
+        if self._consecutive_timeouts >= self.max_timeouts:
+            self._disconnect(sock)
+
+    def _predict_local(self, frame, conf):
+        if self.local is None:
+            self.blind_frames += 1
+            return (np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64))
+        self.local_frames += 1
+        return self.local.predict(frame, conf)
+
+    def rtt_percentile(self, q):
+        return float(np.percentile(self.rtts, q)) * 1000 if self.rtts else 0.0
+
+    def stats(self):
+        state = "已连接" if self.sock is not None else "断开"
+        return (f"远程推理({state}): 远程 {self.remote_frames} 帧, 本地 {self.local_frames} 帧, "
+                f"无结果 {self.blind_frames} 帧, 超时 {self.timeouts}, 在途已满 {self.busy}, "
+                f"断线 {self.disconnects}, RTT p50 {self.rtt_percentile(50):.1f}ms "
+                f"p95 {self.rtt_percentile(95):.1f}ms")
+
+    @staticmethod
+    def _close_socket(sock):
+        # 先 shutdown，阻塞在 recv 里的接收线程才会返回
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+
+    def close(self):
+        with self.lock:
+            sock, self.sock = self.sock, None
+        if sock is not None:
+            self._close_socket(sock)
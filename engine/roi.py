@@ -0,0 +1,55 @@
+import csv
+
+DEFAULT_PRIORS = "bbox_stats_1sigma.csv"
+
+
+def load_priors(path=DEFAULT_PRIORS):
+    """
+    读取 process_data/casual/visualize_size.py 的 save_statistics 输出的 1-sigma 统计
+
+    Returns:
+        {类别名: {"cx_min": ..., "cx_max": ..., ..., "height_max": ...}}，坐标和尺寸都是归一化的
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["class"]: {k: float(v) for k, v in row.items() if k != "class"}
+                for row in csv.DictReader(f)}
+
+
+def prior_roi(priors, classes=None, margin=0.05):
+    """
+    由位置和尺寸先验求推理区域：各类别中心的 1-sigma 范围向外扩展半个平均尺寸，
+    取所有类别的并集，再四周留 margin。
+
+    Args:
+        priors: load_priors 的结果
+        classes: 只考虑这些类别（如小物体 battery、stone），None 表示全部
+        margin (float): 四周额外留出的比例
+
+    Returns:
+        (x0, y0, x1, y1)，相对裁切后画面的归一化坐标
+    """
+    rows = [p for name, p in priors.items() if classes is None or name in classes]
+    if not rows:
+        raise ValueError(f"先验里没有这些类别: {classes}")
+    x0 = min(p["cx_min"] - (p["width_min"] + p["width_max"]) / 4 for p in rows)
+    x1 = max(p["cx_max"] + (p["width_min"] + p["width_max"]) / 4 for p in rows)
+    y0 = min(p["cy_min"] - (p["height_min"] + p["height_max"]) / 4 for p in rows)
+    y1 = max(p["cy_max"] + (p["height_min"] + p["height_max"]) / 4 for p in rows)
+    return (max(x0 - margin, 0.0), max(y0 - margin, 0.0),
+            min(x1 + margin, 1.0), min(y1 + margin, 1.0))
+
+
+def roi_pixels(roi, width, height):
+    """
+    把归一化的区域换成像素切片范围，并扩成正方形（模型输入是正方形，避免拉伸），
+    超出画面时向内平移
+
+    Returns:
+        (x0, y0, side)
+    """
+    x0, y0, x1, y1 = roi[0] * width, roi[1] * height, roi[2] * width, roi[3] * height
+    side = int(round(min(max(x1 - x0, y1 - y0), width, height)))
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    left = int(round(min(max(cx - side / 2, 0), width - side)))
+    top = int(round(min(max(cy - side / 2, 0), height - side)))
+    return left, top, side
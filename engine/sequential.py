@@ -0,0 +1,59 @@
+import math
+
+from .tracks import TrackDecider
+
+
+class SequentialDecider(TrackDecider):
+    """
+    序贯概率比检验（SPRT）式的提前决策：每条轨迹按类别累计置信度证据，
+    证据超过由错误率决定的边界就立即决策，不再固定等 threshold 帧。
+
+    每帧把检测分数 s 换成对数几率 log(s / (1 - s)) 加到该类别的证据上，
+    同时从这条轨迹上其它类别的证据里减去，类别来回跳时证据会相互抵消。
+    边界为 log((1 - error) / error)，error=0.01 时约 4.6，并且至少要看到 min_frames 帧：
+    0.92 左右的检测 2 帧就能决策，0.7 左右仍按原规则等到第 5 帧。
+    单帧再高的分数也不会直接触发执行器。
+
+    原来的规则（同一类别累计 threshold 票）仍然有效，两者谁先满足谁触发，
+    所以决策不会比 TrackDecider 更晚。
+
+    Args:
+        threshold (int): 票数阈值，见 TrackDecider
+        error (float): 允许的误判概率，越小越保守
+        min_frames (int): 证据决策至少需要的帧数，不小于 2
+        max_score (float): 单帧分数的上限，避免一帧 0.9999 的检测直接越过边界
+        iou (float): 见 IouTracker
+        max_misses (int): 见 IouTracker
+    """
+
+    def __init__(self, threshold=5, error=0.01, min_frames=2, max_score=0.995, iou=0.3,
+                 max_misses=5):
+        if min_frames < 2:
+            raise ValueError("min_frames 至少为 2，单帧检测不能直接决策")
+        super().__init__(threshold, iou=iou, max_misses=max_misses)
+        self.error = error
+        self.bound = math.log((1 - error) / error)
+        self.min_frames = min_frames
+        self.max_score = max_score
+        self.early = 0  # 由证据（而不是票数）触发的决策数
+
+    def ready(self, track, cls_id, score):
+        cls_id_by_votes = super().ready(track, cls_id, score)
+        score = min(score, self.max_score)
+        llr = math.log(score / (1 - score))
+        evidence = track.evidence
+        for other in evidence:
+            if other != cls_id:
+                evidence[other] -= llr
+        evidence[cls_id] = evidence.get(cls_id, 0.0) + llr
+        if cls_id_by_votes is not None:
+            return cls_id_by_votes
+        if len(track.votes) >= self.min_frames and evidence[cls_id] >= self.bound:
+            self.early += 1
+            return cls_id
+        return None
+
+    def stats(self):
+        return (f"序贯决策: 跟踪中 {len(self.tracker.tracks)} 个, 已决策 {self.decided} 个物体"
+                f"（证据提前 {self.early} 个）, 抑制重复 {self.suppressed} 帧, "
+                f"决策帧数 {self.latency_summary() or '-'}")
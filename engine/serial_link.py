@@ -0,0 +1,187 @@
+"""
+Arduino 串口链路：后台线程负责写串口，推理循环只往有界队列里放命令，不会被串口卡住。
+
+两种协议:
+    legacy  与原来的 Arduino 程序兼容，只发送一个字符的分类编号，如 b"2"
+    framed  每条命令一行 b"<分类编号,序号,时间戳ms>\\n"，开启 ack 时
+            Arduino 需回复 b"A<序号>\\n"，超时则重发，重试用完记为失败
+"""
+import threading
+import time
+from collections import deque
+
+from .timing import StageTimer
+
+PROTOCOLS = ("legacy", "framed")
+
+
+class Command:
+    """一条待发送的命令"""
+
+    __slots__ = ("category_id", "seq", "key", "created_at", "merged")
+
+    def __init__(self, category_id, seq, key=None):
+        self.category_id = category_id
+        self.seq = seq
+        self.key = key
+        self.created_at = time.time()
+        self.merged = 0
+
+
+def encode_command(command, protocol="framed"):
+    if protocol == "legacy":
+        return str(command.category_id).encode()
+    ts_ms = int(command.created_at * 1000)
+    return f"<{command.category_id},{command.seq},{ts_ms}>\n".encode()
+
+
+def decode_command(line):
+    """解析 framed 命令，返回 (分类编号, 序号, 时间戳ms)，格式不对返回 None"""
+    line = line.strip()
+    if not (line.startswith(b"<") and line.endswith(b">")):
+        return None
+    try:
+        category_id, seq, ts_ms = (int(v) for v in line[1:-1].split(b","))
+    except ValueError:
+        return None
+    return category_id, seq, ts_ms
+
+
+class SerialWorker:
+    """
+    串口 I/O 线程
+
+    Args:
+        ser: 已打开的 serial.Serial（或任何有 write/readline 的对象）
+        protocol (str): legacy 或 framed
+        ack (bool): 是否等待 Arduino 的 ACK（仅 framed）
+        ack_timeout (float): 等待 ACK 的时间（秒）
+        retries (int): 没收到 ACK 时的重发次数
+        queue_size (int): 命令队列长度，满了丢弃最旧的命令
+        merge_window (float): 该时间内同一物体（key 相同）的重复命令合并为一条
+        startup_delay (float): 打开串口后等待 Arduino 重启的时间，在线程中等待，不阻塞调用方
+        verbose (bool): 是否打印每条发送成功的命令
+    """
+
+    def __init__(self, ser, protocol="legacy", ack=False, ack_timeout=0.2, retries=2,
+                 queue_size=8, merge_window=1.0, startup_delay=0.0, verbose=True):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"未知的串口协议: {protocol}，可选 {PROTOCOLS}")
+        self.ser = ser
+        self.protocol = protocol
+        self.ack = ack and protocol == "framed"
+        self.ack_timeout = ack_timeout
+        self.retries = retries
+        self.merge_window = merge_window
+        self.startup_delay = startup_delay
+        self.verbose = verbose
+        self._queue = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+        self._stop = False
+        self._seq = 0
+        self.timer = StageTimer()
+        self.sent = 0
+        self.acked = 0
+        self.retried = 0
+        self.failed = 0
+        self.merged = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="serial", daemon=True)
+        self._thread.start()
+
+    def send(self, category_id, key=None):
+        """
+        把命令放入队列，立即返回
+
+        Args:
+            key: 命令对应的物体（如轨迹编号）。只有 key 相同的重复命令才会合并，
+                None 表示不合并：同一类别的两个物体前后脚到达时各自需要一次动作
+        """
+        with self._cond:
+            last = self._queue[-1] if self._queue else None
+            if key is not None and last is not None and last.key == key \
+                    and last.category_id == category_id \
+                    and time.time() - last.created_at <= self.merge_window:
+                last.merged += 1
+                self.merged += 1
+                return
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._seq = (self._seq + 1) % 65536
+            self._queue.append(Command(category_id, self._seq, key))
+            self._cond.notify()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._queue)
+
+    def _wait_ack(self, seq):
+        expected = f"A{seq}".encode()
+        deadline = time.perf_counter() + self.ack_timeout
+        while time.perf_counter() < deadline:
+            line = self.ser.readline()
+            if line.strip() == expected:
+                return True
+        return False
+
+    def _write(self, command):
+        payload = encode_command(command, self.protocol)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+            t0 = time.perf_counter()
+            try:
+                self.ser.write(payload)
+            except Exception as e:
+                print(f"串口写入失败: {e}")
+                continue
+            self.timer.add("write", time.perf_counter() - t0)
+            if not self.ack:
+                return True
+            if self._wait_ack(command.seq):
+                self.timer.add("ack", time.perf_counter() - t0)
+                self.acked += 1
+                return True
+        return False
+
+    def _run(self):
+        if self.startup_delay:
+            time.sleep(self.startup_delay)  # 等待 Arduino 初始化
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                command = self._queue.popleft()
+            if self._write(command):
+                self.sent += 1
+                self.timer.add("queue", time.time() - command.created_at)
+                if self.verbose:
+                    print(f"发送: {command.category_id}")
+            else:
+                self.failed += 1
+                print(f"发送失败: {command.category_id} (序号 {command.seq})")
+
+    def stats(self):
+        return (f"串口: 发送 {self.sent}, ACK {self.acked}, 重发 {self.retried}, 失败 {self.failed}, "
+                f"合并 {self.merged}, 丢弃 {self.dropped}, 队列 {self.qsize()} | {self.timer.summary()}")
+
+    def close(self, timeout=2.0):
+        """发完队列里剩下的命令后退出"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+
+def open_serial_worker(port, baud_rate=9600, protocol="legacy", ack=False, **kwargs):
+    """打开串口并启动 SerialWorker"""
+    import serial
+
+    ack_timeout = kwargs.get("ack_timeout", 0.2)
+    # 读超时设短一些，等待 ACK 时按行轮询；写超时防止 USB 串口卡死时线程永远阻塞
+    ser = serial.Serial(port, baud_rate, timeout=ack_timeout / 4, write_timeout=1)
+    print(f"成功连接到 Arduino，端口: {port}")
+    kwargs.setdefault("startup_delay", 2.0)
+    return SerialWorker(ser, protocol=protocol, ack=ack, **kwargs)
@@ -0,0 +1,89 @@
+import time
+
+import cv2
+
+from .draw import Overlay
+from .timing import FpsCounter
+
+
+class Sink:
+    """
+    输出基类
+
+    on_decision 在每次分拣决策时调用，决策不会被丢弃；
+    on_frame 在每帧结果上调用，流水线模式下过时的帧可能被跳过。
+    """
+
+    # 设为 True 时主循环会退出
+    quit = False
+
+    def on_decision(self, decision):
+        pass
+
+    def on_frame(self, result):
+        pass
+
+    def close(self):
+        pass
+
+
+class PrintSink(Sink):
+    """只打印决策，没有连接 Arduino 时使用"""
+
+    def on_decision(self, decision):
+        print(f"Sending to Arduino: {decision.cls_id}")
+
+
+class SerialSink(Sink):
+    """
+    把垃圾分类编号发送给 Arduino。
+
+    实际写串口在 SerialWorker 的后台线程里完成，on_decision 只是入队，
+    串口卡住时不会拖慢推理。协议和 ACK 见 engine.serial_link。
+    """
+
+    def __init__(self, port="/dev/ttyUSB0", baud_rate=9600, protocol="legacy", ack=False, **kwargs):
+        from .serial_link import open_serial_worker
+
+        self.worker = open_serial_worker(port, baud_rate, protocol=protocol, ack=ack, **kwargs)
+
+    def on_decision(self, decision):
+        # 只有按物体去抖时才知道两个决策是不是同一个物体
+        self.worker.send(decision.category_id, key=decision.track_id if decision.track_id >= 0 else None)
+
+    def stats(self):
+        return self.worker.stats()
+
+    def close(self):
+        self.worker.close()
+        if self.worker.ser.is_open:
+            self.worker.ser.close()
+            print("已关闭串口连接。")
+
+
+class DisplaySink(Sink):
+    """
+    用 cv2.imshow 显示检测结果，按 q 退出
+
+    显示刷新率和推理帧率分开，超过 max_fps 的帧直接跳过，不做任何绘制。
+    """
+
+    def __init__(self, window="Detection", max_fps=15.0, names=None):
+        self.window = window
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.overlay = Overlay(names)
+        self.fps = FpsCounter()
+        self._last = 0.0
+
+    def on_frame(self, result):
+        now = time.perf_counter()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        self.fps.tick()
+        cv2.imshow(self.window, self.overlay.render(result.frame, result.detections.raw))
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.quit = True
+
+    def close(self):
+        cv2.destroyAllWindows()
@@ -0,0 +1,181 @@
+import time
+from pathlib import Path
+
+import cv2
+
+from .capture import CaptureConfig, open_capture
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource:
+    """帧来源基类，read() 返回 BGR 图像，读完或出错时返回 None"""
+
+    # 最近一帧的采集时间（perf_counter），None 表示由引擎在处理时记录
+    captured_at = None
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+
+class CameraSource(FrameSource):
+    """
+    USB / CSI 摄像头
+
+    Args:
+        index (int): 摄像头编号
+        config (CaptureConfig): 采集参数（格式、分辨率、缓冲、曝光），
+            None 时只把驱动缓冲设为 1 帧，其余保持默认
+    """
+
+    def __init__(self, index=0, config=None):
+        self.index = index
+        self.config = config if config is not None else CaptureConfig()
+        self.cap = open_capture(index, self.config)
+
+    def read(self):
+        success, frame = self.cap.read()
+        return frame if success else None
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """视频文件，realtime=True 时按文件帧率读取，模拟摄像头"""
+
+    def __init__(self, path, realtime=False):
+        self.path = str(path)
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"无法打开视频文件: {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.realtime = realtime and self.fps > 0
+        self._next_time = None
+
+    def read(self):
+        if self.realtime:
+            now = time.perf_counter()
+            if self._next_time is None:
+                self._next_time = now
+            delay = self._next_time - now
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time += 1.0 / self.fps
+        success, frame = self.cap.read()
+        return frame if success else None
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageFolderSource(FrameSource):
+    """按文件名顺序读取文件夹中的图片"""
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.paths = sorted(p for p in self.folder.iterdir()
+                            if p.suffix.lower() in IMAGE_SUFFIXES)
+        self._index = 0
+
+    def read(self):
+        while self._index < len(self.paths):
+            path = self.paths[self._index]
+            self._index += 1
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                return frame
+            print(f"警告: 无法读取图片 {path}")
+        return None
+
+
+class ReplaySource(FrameSource):
+    """
+    回放预先解码好的帧，解码时间不会混进基准测试
+
+    fps=0 时全速回放；fps>0 时模拟一个该帧率的摄像头：第 i 帧在 i/fps 秒时"采集"，
+    处理跟不上时像 buffer=1 的摄像头一样只拿最新一帧，跳过的帧计入 dropped。
+
+    Attributes:
+        index (int): 最近一帧在原序列中的下标
+        captured_at (float): 最近一帧的名义采集时间
+    """
+
+    def __init__(self, frames, fps=0.0):
+        self.frames = frames
+        self.fps = fps
+        self.index = -1
+        self.dropped = 0
+        self.read_at = []  # 全速回放时每帧被读取的时间
+        self.started_at = None  # 第一次 read 的时间
+
+    @classmethod
+    def preload(cls, spec, limit=0, fps=0.0):
+        """从视频文件或图片文件夹读出全部帧"""
+        frames = []
+        source = open_source(spec)
+        for frame in source:
+            frames.append(frame)
+            if limit and len(frames) >= limit:
+                break
+        source.release()
+        return cls(frames, fps)
+
+    def capture_time(self, index):
+        """第 index 帧的（名义）采集时间"""
+        if self.fps:
+            return self.started_at + index / self.fps
+        return self.read_at[index] if index < len(self.read_at) else None
+
+    def read(self):
+        now = time.perf_counter()
+        if self.started_at is None:
+            self.started_at = now
+        if not self.fps:
+            self.index += 1
+            self.captured_at = now
+            self.read_at.append(now)
+        else:
+            # 当前时刻摄像头缓冲里最新的一帧
+            latest = int((now - self.started_at) * self.fps)
+            if latest <= self.index:
+                latest = self.index + 1
+                delay = self.capture_time(latest) - now
+                if delay > 0:
+                    time.sleep(delay)
+            self.dropped += max(0, latest - self.index - 1)
+            self.index = latest
+            self.captured_at = self.capture_time(latest)
+        if self.index >= len(self.frames):
+            return None
+        return self.frames[self.index]
+
+
+def is_camera(spec):
+    return isinstance(spec, int) or str(spec).isdigit()
+
+
+def open_source(spec, realtime=False, capture=None):
+    """
+    根据参数打开帧来源
+
+    Args:
+        spec: 摄像头编号（int 或数字字符串）、图片文件夹或视频文件路径
+        realtime (bool): 视频文件是否按原始帧率读取
+        capture (CaptureConfig): 摄像头采集参数，对文件无效
+    """
+    if is_camera(spec):
+        return CameraSource(int(spec), capture)
+    if Path(spec).is_dir():
+        return ImageFolderSource(spec)
+    return VideoFileSource(spec, realtime=realtime)
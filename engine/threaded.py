@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+
+from .queues import DropOldestQueue
+from .timing import FpsCounter
+
+
+class ThreadedPipeline:
+    """
+    流水线模式：采集线程只保留最新一帧，推理线程独占模型，
+    主线程负责绘制、显示和串口发送，整体帧率只受推理速度限制。
+
+    决策走单独的队列，不会因为显示跟不上而被丢弃。
+    """
+
+    def __init__(self, engine, stats_interval=2.0, display_depth=2, command_depth=16):
+        self.engine = engine
+        # 显示队列里的画面、主线程正在输出的一帧和推理线程正在写的一帧都不能被覆盖
+        engine.preprocessor.reserve(display_depth + 2)
+        self.stats_interval = stats_interval
+        self.stop_event = threading.Event()
+        self.frame_queue = DropOldestQueue(maxsize=1)                # 采集 -> 推理，只保留最新帧
+        self.display_queue = DropOldestQueue(maxsize=display_depth)  # 推理 -> 显示，过时的画面直接丢弃
+        self.command_queue = queue.Queue(maxsize=command_depth)      # 推理 -> 串口，决策不能丢
+        if engine.metrics is not None:
+            engine.metrics.watch_queue("frame", self.frame_queue)
+            engine.metrics.watch_queue("display", self.display_queue)
+            engine.metrics.watch_queue("command", self.command_queue)
+        self.capture_fps = FpsCounter()
+        self.infer_fps = FpsCounter()
+        self.output_fps = FpsCounter()
+        self.latency = 0.0
+
+    def _capture_loop(self):
+        engine = self.engine
+        while not self.stop_event.is_set():
+            frame = engine.decode()
+            if frame is None:
+                break
+            self.frame_queue.put((time.perf_counter(), frame))
+            self.capture_fps.tick()
+        self.stop_event.set()
+
+    def _inference_loop(self):
+        engine = self.engine
+        while True:
+            item = self.frame_queue.get(timeout=0.1)
+            if item is None:
+                if self.stop_event.is_set():
+                    break
+                continue
+            captured_at, frame = item
+            result = engine.process(frame, captured_at=captured_at)
+            self.infer_fps.tick()
+            for decision in result.decisions:
+                try:
+                    self.command_queue.put_nowait(decision)
+                except queue.Full:
+                    print("警告: 串口发送队列已满，丢弃决策")
+            if engine.frame_sinks:
+                self.display_queue.put(result)
+        # 通知输出线程推理已结束
+        self.command_queue.put(None)
+
+    def stats(self):
+        return (f"FPS 采集/推理/输出: {self.capture_fps.fps:.1f}/{self.infer_fps.fps:.1f}/{self.output_fps.fps:.1f} | "
+                f"队列深度 帧/显示/串口: {self.frame_queue.qsize()}/{self.display_queue.qsize()}/{self.command_queue.qsize()} | "
+                f"丢帧 采集/显示: {self.frame_queue.dropped}/{self.display_queue.dropped} | "
+                f"延迟: {self.latency * 1000:.0f}ms")
+
+    def run(self):
+        engine = self.engine
+        capture_thread = threading.Thread(target=self._capture_loop, name="capture", daemon=True)
+        inference_thread = threading.Thread(target=self._inference_loop, name="inference", daemon=True)
+        capture_thread.start()
+        inference_thread.start()
+
+        last_report = time.perf_counter()
+        running = True
+        try:
+            while running and not engine.quit_requested:
+                # 先把所有待发送的决策发出去
+                while True:
+                    try:
+                        decision = self.command_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if decision is None:
+                        running = False
+                        break
+                    print(f" {decision.label}, {decision.trash_type}")
+                    t0 = time.perf_counter()
+                    engine.emit_decision(decision)
+                    engine.timer.add("emit", time.perf_counter() - t0)
+
+                result = self.display_queue.get(timeout=0.05)
+                if result is not None:
+                    engine.emit_frame(result)
+                    self.latency = time.perf_counter() - result.captured_at
+                    self.output_fps.tick()
+
+                now = time.perf_counter()
+                if self.stats_interval and now - last_report >= self.stats_interval:
+                    last_report = now
+                    print(self.stats())
+                    print(f"    {engine.timer.summary()}")
+                    for line in engine.stats_lines():
+                        print(f"    {line}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            inference_thread.join(timeout=2)
+            capture_thread.join(timeout=2)
+            engine.close()
@@ -0,0 +1,87 @@
+import os
+import time
+from collections import deque
+
+# 没有 /proc 时以第一次导入 engine 的时间近似进程启动时间
+_IMPORTED_AT = time.time()
+
+
+def process_uptime():
+    """当前进程已运行的秒数（含 import 和加载模型的时间），Linux 上从 /proc 读取启动时间"""
+    try:
+        with open(f"/proc/{os.getpid()}/stat") as f:
+            # comm 字段可能含空格，从最后一个 ')' 之后开始数，starttime 是第 22 个字段
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            boot_uptime = float(f.read().split()[0])
+        return boot_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time() - _IMPORTED_AT
+
+
+class FpsCounter:
+    """统计最近一段时间内的帧率"""
+
+    def __init__(self, window=30):
+        self._stamps = deque(maxlen=window)
+
+    def tick(self):
+        self._stamps.append(time.perf_counter())
+
+    @property
+    def fps(self):
+        if len(self._stamps) < 2:
+            return 0.0
+        span = self._stamps[-1] - self._stamps[0]
+        return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+
+class StageTimer:
+    """
+    按阶段记录耗时，保留最近 window 个样本用于求均值。
+
+    各阶段调用 add(stage, seconds)，开销只有一次字典查找和一次 deque.append，
+    可以在推理线程和输出线程中同时使用。window=None 时保留全部样本（离线基准测试用）。
+    observer(stage, seconds) 不为 None 时每个样本也会转交给它（见 engine.metrics）。
+    """
+
+    STAGES = ("decode", "preprocess", "gate", "infer", "track", "postprocess", "decide", "emit")
+
+    def __init__(self, window=100):
+        self.window = window
+        self.samples = {stage: deque(maxlen=window) for stage in self.STAGES}
+        self.totals = {stage: 0.0 for stage in self.STAGES}
+        self.counts = {stage: 0 for stage in self.STAGES}
+        self.observer = None
+
+    def add(self, stage, seconds):
+        if stage not in self.samples:
+            self.samples[stage] = deque(maxlen=self.window)
+            self.totals[stage] = 0.0
+            self.counts[stage] = 0
+        self.samples[stage].append(seconds)
+        self.totals[stage] += seconds
+        self.counts[stage] += 1
+        if self.observer is not None:
+            self.observer(stage, seconds)
+
+    def mean(self, stage):
+        """最近窗口内的平均耗时（秒）"""
+        samples = self.samples.get(stage)
+        if not samples:
+            return 0.0
+        return sum(samples) / len(samples)
+
+    def percentile(self, stage, q):
+        """最近窗口内耗时的 q 分位数（秒）"""
+        samples = self.samples.get(stage)
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+    def summary(self):
+        """返回形如 'decode 1.2ms | infer 45.0ms' 的字符串"""
+        parts = [f"{stage} {self.mean(stage) * 1000:.1f}ms"
+                 for stage, samples in self.samples.items() if samples]
+        return " | ".join(parts)
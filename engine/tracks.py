@@ -0,0 +1,134 @@
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .decide import Decision
+from .ops import box_iou_matrix
+
+
+@dataclass
+class Track:
+    """一个被跟踪的物体"""
+    track_id: int
+    box: np.ndarray
+    votes: deque = field(default_factory=deque)  # 最近若干帧的 (cls_id, score)
+    hits: int = 0
+    misses: int = 0
+    decided: bool = False
+    born: int = 0  # 轨迹出现时决策器已处理的帧数
+    evidence: dict = field(default_factory=dict)  # cls_id -> 累计对数似然比，见 engine.sequential
+
+
+class IouTracker:
+    """
+    按 IoU 把每帧的检测框关联到已有的轨迹，多个物体同时在画面里时各自独立。
+
+    关联不看类别（同一物体在不同帧可能被识别成不同类别），按 IoU 从大到小贪心匹配，
+    没匹配上的框新建轨迹，连续 max_misses 帧没匹配上的轨迹被删除。
+
+    Args:
+        iou (float): 框与轨迹关联的最小 IoU
+        max_misses (int): 轨迹允许连续丢失的帧数
+        history (int): 每条轨迹保留的投票数
+    """
+
+    def __init__(self, iou=0.3, max_misses=5, history=30):
+        self.iou = iou
+        self.max_misses = max_misses
+        self.history = history
+        self.tracks = []
+        self.next_id = 0
+
+    def reset(self):
+        self.tracks = []
+
+    def update(self, boxes, frame=0):
+        """输入一帧的 (N, 4) 框，返回每个框对应的 Track，frame 记为新轨迹的 born"""
+        assigned = [None] * len(boxes)
+        matched = set()
+        if self.tracks and len(boxes):
+            ious = box_iou_matrix(np.stack([t.box for t in self.tracks]), boxes)
+            ti, di = np.nonzero(ious >= self.iou)
+            for k in ious[ti, di].argsort()[::-1]:
+                t, d = int(ti[k]), int(di[k])
+                if t in matched or assigned[d] is not None:
+                    continue
+                matched.add(t)
+                assigned[d] = self.tracks[t]
+        for t, track in enumerate(self.tracks):
+            track.misses = 0 if t in matched else track.misses + 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        for d, track in enumerate(assigned):
+            if track is None:
+                track = Track(self.next_id, boxes[d], deque(maxlen=self.history), born=frame)
+                self.next_id += 1
+                self.tracks.append(track)
+                assigned[d] = track
+            track.box = boxes[d]
+            track.hits += 1
+        return assigned
+
+
+class TrackDecider:
+    """
+    按物体去抖：每条轨迹有自己的投票历史，某个类别在这条轨迹上累计出现 threshold 次
+    就对这个物体输出一次决策，之后这条轨迹不再触发。
+
+    与 Debouncer 的区别：
+        - 画面里同时有多个物体时，计数不会在它们之间来回清零
+        - 偶尔一帧识别成别的类别或漏检，不会让计数从头开始
+        - 同一个物体停留再久也只决策一次
+
+    接口与 Debouncer 相同（update / reset），可以直接替换 DetectionEngine.decider。
+
+    Args:
+        threshold (int): 同一类别在一条轨迹上的票数阈值
+        iou (float): 见 IouTracker
+        max_misses (int): 见 IouTracker
+    """
+
+    def __init__(self, threshold=5, iou=0.3, max_misses=5):
+        self.threshold = threshold
+        self.tracker = IouTracker(iou, max_misses, history=max(threshold * 2, 10))
+        self.frames = 0
+        self.decided = 0
+        self.suppressed = 0  # 已决策的物体之后又被检测到的帧数
+        self.latencies = Counter()  # 物体出现到决策的帧数 -> 物体数
+
+    def reset(self):
+        self.tracker.reset()
+
+    def ready(self, track, cls_id, score):
+        """记录一帧的投票，返回应当决策的类别，还不能决策时返回 None"""
+        track.votes.append((cls_id, score))
+        top, count = Counter(c for c, _ in track.votes).most_common(1)[0]
+        return top if count >= self.threshold else None
+
+    def update(self, detections):
+        """输入一帧的 Detections，返回触发的 Decision 列表"""
+        self.frames += 1
+        tracks = self.tracker.update(detections.boxes, self.frames)
+        decisions = []
+        table = detections.table
+        for i, track in enumerate(tracks):
+            if track.decided:
+                self.suppressed += 1
+                continue
+            cls_id = self.ready(track, int(detections.classes[i]), float(detections.scores[i]))
+            if cls_id is None:
+                continue
+            track.decided = True
+            self.decided += 1
+            self.latencies[self.frames - track.born + 1] += 1
+            score = float(np.mean([s for c, s in track.votes if c == cls_id]))
+            decisions.append(Decision(cls_id, table.labels[cls_id], table.trash_types[cls_id],
+                                      int(table.category_ids[cls_id]), score, track.track_id))
+        return decisions
+
+    def latency_summary(self):
+        return " ".join(f"{n}帧:{self.latencies[n]}" for n in sorted(self.latencies))
+
+    def stats(self):
+        return (f"按物体去抖: 跟踪中 {len(self.tracker.tracks)} 个, 已决策 {self.decided} 个物体, "
+                f"抑制重复 {self.suppressed} 帧, 决策帧数 {self.latency_summary() or '-'}")
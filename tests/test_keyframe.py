@@ -0,0 +1,40 @@
+import numpy as np
+
+from engine import DetectionEngine
+from engine.keyframe import KeyframeScheduler
+
+
+class OneHitBackend:
+    """只在第一次推理时检测到一个物体（模拟一次误检），之后什么都没有"""
+    names = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, frame, conf):
+        self.calls += 1
+        if self.calls == 1:
+            return (np.array([[100, 100, 200, 200]], np.float32), np.array([0.95], np.float32),
+                    np.array([0], np.int64))
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64)
+
+
+class StillTracker:
+    """框原地不动、置信度始终为 1 的跟踪器，中间帧一定由跟踪得到"""
+
+    def init(self, frame, boxes):
+        self.boxes = np.asarray(boxes, np.float32)
+
+    def update(self, frame):
+        return self.boxes.copy(), np.ones(len(self.boxes), np.float32)
+
+
+def test_one_detection_does_not_fire_with_keyframes():
+    threshold = 5
+    engine = DetectionEngine(OneHitBackend(), threshold=threshold, imgsz=320,
+                             scheduler=KeyframeScheduler(interval=threshold * 2, tracker=StillTracker()))
+    frame = np.zeros((480, 640, 3), np.uint8)
+    results = [engine.process(frame) for _ in range(threshold * 2)]
+    # 跟踪把那次检测带过了至少 threshold 帧，但它们不算投票
+    assert sum(not r.inferred and len(r.detections) for r in results) >= threshold
+    assert not any(r.decisions for r in results)
@@ -0,0 +1,155 @@
+"""
+基于 pty 的 Arduino 模拟器，没有硬件时在 Linux 上测试串口链路
+
+    python -m tools.arduino_sim --ack                # 打印虚拟串口路径，供 detect_pi.py --port 使用
+    python -m tools.arduino_sim --loadtest 500 --ack --drop-rate 0.1 --stall 0.5
+
+模拟器同时识别 legacy（单个数字字符）和 framed（<分类,序号,时间戳>）两种命令，
+可以模拟处理延迟、丢 ACK 和串口卡顿。--loadtest 会在同一进程里启动模拟器，
+用 SerialWorker 按给定速率发送命令并打印统计结果。
+"""
+import argparse
+import os
+import pty
+import random
+import threading
+import time
+import tty
+
+from engine.serial_link import PROTOCOLS, decode_command, open_serial_worker
+
+
+class ArduinoSimulator:
+    """
+    Args:
+        ack (bool): 收到 framed 命令后是否回复 A<序号>
+        delay (float): 每条命令的处理时间（秒），模拟舵机动作
+        drop_rate (float): 不回 ACK 的概率
+        stall (float): 每隔一段时间停止读取的秒数，模拟 USB 串口卡住
+        verbose (bool): 是否打印收到的每条命令
+    """
+
+    def __init__(self, ack=False, delay=0.0, drop_rate=0.0, stall=0.0, verbose=True):
+        self.ack = ack
+        self.delay = delay
+        self.drop_rate = drop_rate
+        self.stall = stall
+        self.verbose = verbose
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self.received = []  # (分类编号, 序号, 延迟ms)
+        self._stop = threading.Event()
+
+    def _handle(self, category_id, seq=None, ts_ms=None):
+        latency = time.time() * 1000 - ts_ms if ts_ms is not None else 0.0
+        self.received.append((category_id, seq, latency))
+        if self.verbose:
+            print(f"[模拟器] 分类 {category_id} 序号 {seq} 延迟 {latency:.1f}ms")
+        if self.delay:
+            time.sleep(self.delay)
+        if self.ack and seq is not None and random.random() >= self.drop_rate:
+            os.write(self.master, f"A{seq}\n".encode())
+
+    def run(self):
+        buffer = b""
+        next_stall = time.time() + 5.0
+        while not self._stop.is_set():
+            if self.stall and time.time() >= next_stall:
+                time.sleep(self.stall)
+                next_stall = time.time() + 5.0
+            try:
+                data = os.read(self.master, 256)
+            except OSError:
+                break
+            buffer += data
+            while buffer:
+                if buffer[:1] == b"<":
+                    end = buffer.find(b"\n")
+                    if end < 0:
+                        break
+                    line, buffer = buffer[:end], buffer[end + 1:]
+                    parsed = decode_command(line)
+                    if parsed is None:
+                        print(f"[模拟器] 无法解析: {line!r}")
+                    else:
+                        self._handle(*parsed)
+                elif buffer[:1].isdigit():
+                    self._handle(int(buffer[:1]))
+                    buffer = buffer[1:]
+                else:
+                    buffer = buffer[1:]
+
+    def start(self):
+        thread = threading.Thread(target=self.run, name="arduino-sim", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self._stop.set()
+        os.close(self._slave)
+        os.close(self.master)
+
+
+def load_test(sim, count, rate, protocol, ack, retries, categories):
+    worker = open_serial_worker(sim.port, protocol=protocol, ack=ack, retries=retries,
+                                startup_delay=0.0)
+    t0 = time.perf_counter()
+    send_latency = []
+    for i in range(count):
+        s = time.perf_counter()
+        worker.send(random.choice(categories))
+        send_latency.append(time.perf_counter() - s)
+        if rate:
+            time.sleep(1.0 / rate)
+    worker.close(timeout=30)
+    elapsed = time.perf_counter() - t0
+    time.sleep(0.2)
+
+    send_latency.sort()
+    latencies = sorted(r[2] for r in sim.received if r[1] is not None)
+    print(f"\n发送 {count} 条命令用时 {elapsed:.2f}s")
+    print(f"send() 调用耗时 p50 {send_latency[len(send_latency) // 2] * 1e6:.1f}us, "
+          f"最大 {send_latency[-1] * 1e6:.1f}us")
+    print(worker.stats())
+    print(f"模拟器收到 {len(sim.received)} 条")
+    if latencies:
+        print(f"端到端延迟 p50 {latencies[len(latencies) // 2]:.1f}ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)]:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arduino 串口模拟器")
+    parser.add_argument("--ack", action="store_true", help="回复 ACK")
+    parser.add_argument("--delay", type=float, default=0.0, help="每条命令的处理时间（秒）")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="不回 ACK 的概率")
+    parser.add_argument("--stall", type=float, default=0.0, help="每 5 秒卡住的时长（秒）")
+    parser.add_argument("--loadtest", type=int, default=0, help="发送多少条命令做压力测试")
+    parser.add_argument("--rate", type=float, default=100.0, help="压力测试的发送速率（条/秒），0 表示不限")
+    parser.add_argument("--protocol", default="framed", choices=PROTOCOLS)
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+
+    sim = ArduinoSimulator(ack=args.ack, delay=args.delay, drop_rate=args.drop_rate,
+                           stall=args.stall, verbose=not args.loadtest)
+    sim.start()
+    if args.loadtest:
+        load_test(sim, args.loadtest, args.rate, args.protocol, args.ack, args.retries,
+                  categories=[1, 2, 3, 4])
+        sim.close()
+        return
+
+    print(f"虚拟串口: {sim.port}")
+    print(f"运行: python detect_pi.py --port {sim.port} --protocol framed{' --ack' if args.ack else ''}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+离线回放基准测试：把 test.mp4 或图片文件夹预先解码到内存，用与 detect 脚本相同的参数
+跑一遍检测循环，输出 FPS、各阶段 p50/p95/p99、物体到达到决策的延迟以及完整的决策时间线。
+
+    python -m tools.benchmark --source test.mp4                       # 全速
+    python -m tools.benchmark --source test.mp4 --fps 30 --motion-gate --output bench.json
+    python -m tools.benchmark --source test.mp4 --model models/trashcan.onnx --workers 1 2 3 4
+
+"物体到达"默认由一次逐帧检测的参考回放得到：用 IoU 跟踪把检测框归到各个物体（多个物体
+同时在画面里时分别计算），每个物体第一次出现的帧即到达帧；也可以用 --arrivals 指定一个 JSON
+帧号列表。--decider consecutive / track 比较两种去抖在多物体场景下的决策帧数和漏判。结果写成 JSON，便于跨提交比较。
+--workers 额外用多进程模式（engine.procpool）全速回放，比较不同 worker 数的吞吐。
+"""
+import json
+import subprocess
+import time
+from collections import Counter
+
+import numpy as np
+
+from engine import DetectionEngine, IouTracker, ReplaySource, Sink, StageTimer
+from engine.cli import build_backend, build_decider, build_engine, build_gates, build_parser
+from engine.procpool import ProcessPoolPipeline
+from engine.serial_link import SerialWorker
+
+PERCENTILES = (50, 95, 99)
+
+
+class SerialClock:
+    """代替 Arduino 串口，只记录每次写入的时间"""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, payload):
+        self.writes.append(time.perf_counter())
+
+    def readline(self):
+        return b""
+
+
+class TimelineSink(Sink):
+    """
+    记录每个决策对应的帧号和时间，以及每帧从采集到输出的延迟。
+
+    决策和 SerialSink 一样交给 SerialWorker 的后台线程，时间取串口写入的时刻（t_ms），
+    包含入队和线程切换；emit_ms 是引擎输出决策的时刻。
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.decisions = []
+        self.frame_latencies = []
+        self.clock = SerialClock()
+        # 队列足够大，不丢也不合并命令，第 i 次写入就是第 i 个决策
+        self.worker = SerialWorker(self.clock, queue_size=65536, verbose=False)
+        self._captured = []
+
+    def on_decision(self, decision):
+        now = time.perf_counter()
+        self.worker.send(decision.category_id)
+        self._captured.append(self.source.captured_at)
+        self.decisions.append({
+            "frame": self.source.index,
+            "emit_ms": (now - self.source.started_at) * 1000,
+            "label": decision.label,
+            "category_id": decision.category_id,
+            "score": round(decision.score, 4),
+            "track_id": decision.track_id,
+        })
+
+    def on_frame(self, result):
+        self.frame_latencies.append(time.perf_counter() - result.captured_at)
+
+    def close(self):
+        self.worker.close(timeout=10.0)
+        for decision, captured_at, written in zip(self.decisions, self._captured, self.clock.writes):
+            decision["t_ms"] = (written - self.source.started_at) * 1000
+            decision["latency_ms"] = (written - captured_at) * 1000
+
+
+def find_arrivals(backend, frames, args, gap=3, min_frames=2):
+    """
+    参考回放：逐帧检测（不用门控和跟踪），用 IoU 跟踪把检测框归到各个物体，
+    同时在画面里的多个物体各算一次到达。出现不到 min_frames 帧的当作误检忽略。
+
+    Returns:
+        [(到达帧号, 最后出现的帧号, 类别名), ...]，按到达帧号排序
+    """
+    engine = DetectionEngine(backend, conf=args.conf, crop=args.crop, imgsz=args.imgsz or None)
+    tracker = IouTracker(args.track_iou, max_misses=gap)
+    objects = {}  # 轨迹编号 -> [到达帧号, 最后出现的帧号, 各帧类别名]
+    for i, frame in enumerate(frames):
+        detections = engine.process(frame).detections
+        for track, label in zip(tracker.update(detections.boxes), detections.labels):
+            obj = objects.setdefault(track.track_id, [i, i, []])
+            obj[1] = i
+            obj[2].append(label)
+    return sorted((start, end, max(set(labels), key=labels.count))
+                  for start, end, labels in objects.values() if len(labels) >= min_frames)
+
+
+def match_arrivals(arrivals, decisions, source, slack=3):
+    """
+    每个物体取它出现期间（最多晚 slack 帧）第一个还没被用掉的决策，类别相同的优先，
+    一个决策只对应一个物体，多出来的决策是重复或误判
+    """
+    rows = []
+    used = set()
+    for start, end, label in arrivals:
+        candidates = [k for k, d in enumerate(decisions)
+                      if k not in used and start <= d["frame"] <= end + slack]
+        k = next((k for k in candidates if decisions[k]["label"] == label),
+                 candidates[0] if candidates else None)
+        row = {"arrival_frame": start, "end_frame": end, "label": label, "decided": k is not None}
+        if k is not None:
+            used.add(k)
+            hit = decisions[k]
+            row.update({
+                "decision_frame": hit["frame"],
+                "decision_label": hit["label"],
+                "frames_to_decision": hit["frame"] - start + 1,
+                "ms_to_decision": hit["t_ms"] - (source.capture_time(start) - source.started_at) * 1000,
+            })
+        rows.append(row)
+    return rows, len(decisions) - len(used)
+
+
+def percentiles(values):
+    if not len(values):
+        return {f"p{q}": None for q in PERCENTILES}
+    return {f"p{q}": float(np.percentile(values, q)) for q in PERCENTILES}
+
+
+def worker_scaling(backend, frames, args, roi=None):
+    """多进程模式下不同 worker 数的全速吞吐，决策应与单进程一致"""
+    rows = []
+    for workers in args.workers:
+        timeline = TimelineSink(ReplaySource(frames))
+        engine = DetectionEngine(backend, timeline.source, sinks=[timeline], conf=args.conf,
+                                 threshold=args.threshold, crop=args.crop, imgsz=args.imgsz or None,
+                                 gates=build_gates(args), decider=build_decider(args), roi=roi)
+        engine.timer = StageTimer(window=None)
+        pool = ProcessPoolPipeline(engine, args.model, args.backend, workers=workers)
+        pool.run()
+        fps = engine.frames / pool.elapsed if pool.elapsed else 0.0
+        rows.append({
+            "workers": workers,
+            "fps": fps,
+            "infer_ms_p50": engine.timer.percentile("infer", 50) * 1000,
+            "frame_latency_ms": percentiles(np.array(timeline.frame_latencies) * 1000),
+            "decisions": len(timeline.decisions),
+        })
+    return rows
+
+
+def stage_stats(timer):
+    stats = {}
+    for stage, samples in timer.samples.items():
+        if samples:
+            stats[stage] = {f"p{q}": timer.percentile(stage, q) * 1000 for q in PERCENTILES}
+            stats[stage]["mean"] = timer.mean(stage) * 1000
+            stats[stage]["count"] = timer.counts[stage]
+    return stats
+
+
+def frame_histogram(values):
+    """决策帧数 -> 物体数"""
+    counts = Counter(values)
+    return {n: counts[n] for n in sorted(counts)}
+
+
+def fmt(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = build_parser("离线回放基准测试", source="test.mp4", conf=0.7)
+    parser.add_argument("--frames", type=int, default=0, help="最多回放的帧数，0 表示全部")
+    parser.add_argument("--fps", type=float, default=0.0,
+                        help="模拟摄像头帧率，0 表示全速回放")
+    parser.add_argument("--arrivals", help="物体到达帧号的 JSON 列表，不给则做一次参考回放")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="另外测量多进程模式的吞吐，如 1 2 3 4（每个数各跑一遍）")
+    parser.add_argument("--output", help="结果 JSON 路径，不给则只打印摘要")
+    args = parser.parse_args()
+
+    source = ReplaySource.preload(args.source, args.frames, args.fps)
+    frames = source.frames
+    print(f"预解码 {len(frames)} 帧")
+    backend = build_backend(args)
+
+    # 预热，避免首帧的初始化开销进入统计
+    warmup = DetectionEngine(backend, conf=args.conf, crop=args.crop, imgsz=args.imgsz or None)
+    for frame in frames[:5]:
+        warmup.process(frame)
+
+    if args.arrivals:
+        with open(args.arrivals, encoding="utf-8") as f:
+            starts = sorted(int(i) for i in json.load(f))
+        # 没有物体的结束帧，到下一个到达之前都算它的决策
+        arrivals = [(start, stop - 1, None) for start, stop in zip(starts, starts[1:] + [len(frames)])]
+    else:
+        arrivals = find_arrivals(backend, frames, args)
+
+    timeline = TimelineSink(source)
+    # 与 detect 脚本相同的门控、跟踪等设置
+    engine = build_engine(args, sinks=[timeline], backend=backend, source=source)
+    engine.timer = StageTimer(window=None)
+    t0 = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - t0
+
+    rows, extra = match_arrivals(arrivals, timeline.decisions, source)
+    decided = [r for r in rows if r["decided"]]
+
+    report = {
+        "revision": git_revision(),
+        "model": args.model,
+        "backend": args.backend,
+        "source": args.source,
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output",)},
+        "frames": len(frames),
+        "processed": engine.frames,
+        "dropped": source.dropped,
+        "elapsed_s": elapsed,
+        "fps": engine.frames / elapsed if elapsed else 0.0,
+        "stages_ms": stage_stats(engine.timer),
+        "frame_latency_ms": percentiles(np.array(timeline.frame_latencies) * 1000),
+        "arrivals": len(rows),
+        "missed": len(rows) - len(decided),
+        "extra_decisions": extra,
+        "wrong_label": sum(r["label"] is not None and r["decision_label"] != r["label"] for r in decided),
+        "frames_to_decision": percentiles([r["frames_to_decision"] for r in decided]),
+        "frames_to_decision_hist": frame_histogram(r["frames_to_decision"] for r in decided),
+        "ms_to_decision": percentiles([r["ms_to_decision"] for r in decided]),
+        "objects": rows,
+        "decisions": timeline.decisions,
+    }
+    if engine.gates:
+        report["gates"] = {type(gate).__name__: {"frames": gate.frames, "passed": gate.passed,
+                                                 **getattr(gate, "reasons", {})}
+                           for gate in engine.gates}
+    if engine.cascade is not None:
+        report["cascade"] = {"escalation_rate": engine.cascade.escalation_rate,
+                             "escalated": engine.cascade.escalated,
+                             "reasons": engine.cascade.reasons}
+    for line in engine.stats_lines():
+        print(line)
+    print(f"\n{report['processed']} 帧 / {elapsed:.2f}s = {report['fps']:.1f} FPS, 跳帧 {report['dropped']}")
+    print(f"{'阶段':<12} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+    for stage, stats in report["stages_ms"].items():
+        print(f"{stage:<12} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f}")
+    print(f"物体 {report['arrivals']} 个, 漏判 {report['missed']} 个, 多余决策 {extra} 个, "
+          f"到达->决策 帧数 p50 {fmt(report['frames_to_decision']['p50'])}, "
+          f"到达->串口写入 毫秒 p50 {fmt(report['ms_to_decision']['p50'])}")
+    print("决策帧数分布: " + (" ".join(f"{n}帧:{c}" for n, c in report["frames_to_decision_hist"].items())
+                           or "-"))
+    if args.workers:
+        report["worker_scaling"] = worker_scaling(backend, frames, args, roi=engine.roi)
+        base = report["worker_scaling"][0]["fps"]
+        print(f"\n{'worker':<8} {'FPS':>8} {'加速比':>8} {'推理p50ms':>10} {'延迟p50ms':>10} {'决策':>6}")
+        for row in report["worker_scaling"]:
+            print(f"{row['workers']:<8} {row['fps']:>8.1f} {row['fps'] / base if base else 0:>8.2f} "
+                  f"{row['infer_ms_p50']:>10.2f} {fmt(row['frame_latency_ms']['p50']):>10} "
+                  f"{row['decisions']:>6}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+对比 ultralytics(.pt) 与 onnxruntime(.onnx) 的检测结果和延迟
+
+    python -m tools.check_onnx_parity --model models/trashcan.pt --source test.mp4
+
+两边按与 detect_pi.py 相同的方式裁切并缩放到 320x320，逐帧按类别和 IoU 配对检测框，
+框坐标误差超过 --box-tol 像素、分数误差超过 --score-tol 或框数量不一致都算不一致。
+有不一致时退出码为 1。
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from engine import DetectionEngine, load_backend, open_source
+from engine.ops import box_iou
+
+
+def load_frames(source, limit, imgsz):
+    """预先读出并预处理若干帧，避免解码时间混进延迟统计"""
+    engine = DetectionEngine(backend=None, crop=True, imgsz=imgsz)
+    frames = []
+    for frame in open_source(source):
+        # preprocess 返回的是会被之后的帧覆盖的环形缓冲，要保留就得拷贝
+        frames.append(engine.preprocess(frame).copy())
+        if len(frames) >= limit:
+            break
+    return frames
+
+
+def match(ref, out, box_tol, score_tol):
+    """返回 (是否一致, 最大框误差, 最大分数误差)"""
+    ref_boxes, ref_scores, ref_cls = ref
+    boxes, scores, classes = out
+    if len(ref_boxes) != len(boxes):
+        return False, float("inf"), float("inf")
+    max_box, max_score = 0.0, 0.0
+    used = np.zeros(len(boxes), dtype=bool)
+    for box, score, cls_id in zip(ref_boxes, ref_scores, ref_cls):
+        candidates = np.where((classes == cls_id) & ~used)[0]
+        if not len(candidates):
+            return False, float("inf"), float("inf")
+        best = candidates[box_iou(box, boxes[candidates]).argmax()]
+        used[best] = True
+        max_box = max(max_box, float(np.abs(boxes[best] - box).max()))
+        max_score = max(max_score, abs(float(scores[best]) - float(score)))
+    return max_box <= box_tol and max_score <= score_tol, max_box, max_score
+
+
+def time_backend(backend, frames, conf, warmup=5):
+    for frame in frames[:warmup]:
+        backend.predict(frame, conf)
+    outputs, latencies = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        outputs.append(backend.predict(frame, conf))
+        latencies.append(time.perf_counter() - t0)
+    return outputs, np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX 与 PyTorch 检测结果一致性和延迟对比")
+    parser.add_argument("--model", default="models/trashcan.pt", help=".pt 模型路径")
+    parser.add_argument("--onnx", help=".onnx 模型路径，默认与 .pt 同名")
+    parser.add_argument("--source", default="test.mp4", help="视频文件或图片文件夹")
+    parser.add_argument("--frames", type=int, default=200, help="最多对比的帧数")
+    parser.add_argument("--imgsz", type=int, default=320)
+    parser.add_argument("--conf", type=float, default=0.7)
+    parser.add_argument("--box-tol", type=float, default=1.0, help="框坐标允许误差（像素）")
+    parser.add_argument("--score-tol", type=float, default=0.01, help="分数允许误差")
+    args = parser.parse_args()
+
+    onnx_path = args.onnx or str(Path(args.model).with_suffix(".onnx"))
+    frames = load_frames(args.source, args.frames, args.imgsz)
+    print(f"读取了 {len(frames)} 帧 ({args.imgsz}x{args.imgsz})")
+
+    torch_out, torch_ms = time_backend(load_backend(args.model, "ultralytics"), frames, args.conf)
+    onnx_out, onnx_ms = time_backend(load_backend(onnx_path, "onnx"), frames, args.conf)
+
+    mismatches = 0
+    worst_box, worst_score = 0.0, 0.0
+    for i, (ref, out) in enumerate(zip(torch_out, onnx_out)):
+        ok, box_err, score_err = match(ref, out, args.box_tol, args.score_tol)
+        worst_box = max(worst_box, box_err)
+        worst_score = max(worst_score, score_err)
+        if not ok:
+            mismatches += 1
+            print(f"第 {i} 帧不一致: pt {len(ref[0])} 个框, onnx {len(out[0])} 个框, "
+                  f"框误差 {box_err:.2f}px, 分数误差 {score_err:.4f}")
+
+    print(f"\n一致性: {len(frames) - mismatches}/{len(frames)} 帧一致, "
+          f"最大框误差 {worst_box:.3f}px, 最大分数误差 {worst_score:.4f}")
+    print(f"{'后端':<12} {'均值ms':>8} {'p50ms':>8} {'p95ms':>8}")
+    for name, ms in (("ultralytics", torch_ms), ("onnxruntime", onnx_ms)):
+        print(f"{name:<12} {ms.mean():>8.2f} {np.percentile(ms, 50):>8.2f} {np.percentile(ms, 95):>8.2f}")
+    print(f"加速比: {torch_ms.mean() / onnx_ms.mean():.2f}x")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+把 ultralytics 的 .pt 模型导出为 ONNX，供 OnnxBackend 使用
+
+    python -m tools.export_onnx                       # 导出 trashcan.pt(320) 和 trashcan_640.pt(640)
+    python -m tools.export_onnx --model models/trashcan.pt --imgsz 320
+    python -m tools.export_onnx --model models/trashcan.pt --dynamic   # detect_multi.py 批量推理用
+"""
+import argparse
+from pathlib import Path
+
+# 仓库自带的模型及其训练尺寸
+DEFAULT_MODELS = {
+    "models/trashcan.pt": 320,
+    "models/trashcan_640.pt": 640,
+}
+
+
+def export_onnx(model_path, imgsz, opset=12, simplify=True, dynamic=False):
+    """导出单个模型，返回 .onnx 路径"""
+    from ultralytics import YOLO
+
+    model = YOLO(str(model_path), verbose=False)
+    # 默认固定输入尺寸和 batch=1，onnxruntime 在 ARM 上对静态形状优化更好；
+    # 多路摄像头批量推理时用 dynamic=True 导出可变 batch 的模型
+    onnx_path = model.export(format="onnx", imgsz=imgsz, opset=opset,
+                             simplify=simplify, dynamic=dynamic)
+    print(f"已导出: {model_path} -> {onnx_path} ({imgsz}x{imgsz})")
+    return Path(onnx_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出 ONNX 模型")
+    parser.add_argument("--model", help="模型路径，不指定则导出仓库自带的两个模型")
+    parser.add_argument("--imgsz", type=int, default=320, help="输入尺寸")
+    parser.add_argument("--opset", type=int, default=12)
+    parser.add_argument("--no-simplify", dest="simplify", action="store_false")
+    parser.add_argument("--dynamic", action="store_true", help="导出可变 batch 的模型")
+    args = parser.parse_args()
+
+    models = {args.model: args.imgsz} if args.model else DEFAULT_MODELS
+    for model_path, imgsz in models.items():
+        if not Path(model_path).exists():
+            print(f"跳过，找不到模型: {model_path}")
+            continue
+        export_onnx(model_path, imgsz, args.opset, args.simplify, args.dynamic)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+测量摄像头每种原生模式的实际帧率、解码时间和缓冲延迟，给出 detect 脚本该用的参数
+
+    python -m tools.probe_camera --camera 0
+    python -m tools.probe_camera --camera 0 --format MJPG --imgsz 320 --output camera.json
+
+对每种模式分别测量 buffer=1 和驱动默认缓冲，能看出缓冲带来的额外延迟。
+推荐的模式是短边不小于 --imgsz、像素最少的模式，即裁切中心正方形后只需缩小、
+不再解码会被丢掉的像素。
+"""
+import argparse
+import json
+
+from engine.capture import FORMATS, CaptureConfig, list_modes, measure, open_capture, pick_mode
+
+
+def probe(camera, mode, buffer_size, frames):
+    cap = open_capture(camera, CaptureConfig.for_mode(mode, buffer_size=buffer_size))
+    try:
+        return measure(cap, frames)
+    finally:
+        cap.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量摄像头各模式的帧率和延迟")
+    parser.add_argument("--camera", type=int, default=0, help="摄像头编号")
+    parser.add_argument("--format", choices=FORMATS, help="只测量该格式")
+    parser.add_argument("--imgsz", type=int, default=320, help="推理边长，用于选择推荐模式")
+    parser.add_argument("--min-side", type=int, default=240, help="跳过短边小于该值的模式")
+    parser.add_argument("--max-side", type=int, default=1080, help="跳过短边大于该值的模式")
+    parser.add_argument("--frames", type=int, default=60, help="每种模式读取的帧数")
+    parser.add_argument("--output", help="把结果保存为 JSON")
+    args = parser.parse_args()
+
+    modes = [m for m in list_modes(args.camera)
+             if (not args.format or m.fourcc == args.format)
+             and args.min_side <= min(m.width, m.height) <= args.max_side]
+    if not modes:
+        print("没有找到可用的摄像头模式")
+        return
+    print(f"找到 {len(modes)} 种模式")
+
+    results = []
+    print(f"{'模式':<20} {'缓冲':>4} {'FPS':>6} {'读取ms':>8} {'解码ms':>8} {'旧帧':>4} {'延迟ms':>8}")
+    for mode in modes:
+        for buffer_size in (1, 0):
+            stats = probe(args.camera, mode, buffer_size, args.frames)
+            results.append({"mode": str(mode), "fourcc": mode.fourcc, "width": mode.width,
+                            "height": mode.height, "buffer_size": buffer_size or "default", **stats})
+            print(f"{str(mode):<20} {buffer_size or '默认':>4} {stats['fps']:>6.1f} {stats['read_ms']:>8.2f} "
+                  f"{stats['decode_ms']:>8.2f} {stats['buffered']:>4} {stats['latency_ms']:>8.1f}")
+
+    best = pick_mode(modes, args.imgsz, args.format)
+    if best is not None:
+        print(f"\n推荐: {best}（短边 {min(best.width, best.height)} >= {args.imgsz}）")
+        print(f"    --cam-format {best.fourcc} --cam-size {best.width}x{best.height} --cam-buffer 1")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"camera": args.camera, "recommended": str(best) if best else None,
+                       "modes": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
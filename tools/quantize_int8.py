@@ -0,0 +1,216 @@
+"""
+用自己的数据集做静态 INT8 训练后量化，并输出每个类别的精度损失和延迟对比
+
+    python -m tools.export_onnx --model models/trashcan.pt --imgsz 320
+    python -m tools.quantize_int8 --model models/trashcan.onnx
+    python detect_pi.py --model models/trashcan_int8.onnx   # 或 --backend int8
+
+校准图片默认取自 datasets/train 和 images/origin_img，评估使用 datasets/valid
+（YOLO 标签来自 labelme2yolo.py）。报告写到 <模型名>_int8_report.json。
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from engine import load_class_names
+from engine.backends import OnnxBackend
+from engine.dataset import find_label, list_images, read_yolo_labels
+from engine.ops import box_iou, letterbox, to_blob
+
+# 容易混淆的类别，报告里单独列出它们之间的混淆情况
+CONFUSABLE = ("china", "radish", "stone")
+
+
+class ImageCalibrationReader:
+    """按部署时的 letterbox 预处理喂给 onnxruntime 的校准器"""
+
+    def __init__(self, image_paths, input_name, input_shape):
+        self.image_paths = list(image_paths)
+        self.input_name = input_name
+        self.input_shape = input_shape
+        self._index = 0
+
+    def get_next(self):
+        while self._index < len(self.image_paths):
+            path = self.image_paths[self._index]
+            self._index += 1
+            img = cv2.imread(str(path))
+            if img is None:
+                continue
+            img, _, _ = letterbox(img, self.input_shape)
+            return {self.input_name: to_blob(img)}
+        return None
+
+    def rewind(self):
+        self._index = 0
+
+
+def quantize(fp32_path, int8_path, calib_paths, all_ops=False):
+    from onnxruntime.quantization import (CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # 先做一次图优化和形状推断，量化效果更稳定
+    prep_path = Path(fp32_path).with_name(Path(fp32_path).stem + "_prep.onnx")
+    quant_pre_process(str(fp32_path), str(prep_path), skip_symbolic_shape=True)
+
+    probe = OnnxBackend(prep_path)
+    reader = ImageCalibrationReader(calib_paths, probe.input_name, probe.input_shape)
+    # 检测头把框坐标(0~320)和类别分数(0~1)拼在同一个张量里，整体量化会把分数压成几个台阶，
+    # 所以默认只量化 Conv/MatMul，其余算子保持 float
+    op_types = None if all_ops else ["Conv", "MatMul"]
+    quantize_static(
+        str(prep_path), str(int8_path), reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        op_types_to_quantize=op_types,
+    )
+    prep_path.unlink()
+    print(f"已生成 INT8 模型: {int8_path}（校准图片 {len(calib_paths)} 张）")
+
+
+def evaluate(backend, samples, num_classes, conf, iou_thres=0.5):
+    """
+    在带标签的图片上统计每个类别的 TP/FP/FN，以及 GT 类别 -> 预测类别 的混淆矩阵
+
+    Returns:
+        dict: tp, fp, fn (num_classes,), confusion (num_classes, num_classes), latency_ms
+    """
+    tp = np.zeros(num_classes, np.int64)
+    fp = np.zeros(num_classes, np.int64)
+    gt_total = np.zeros(num_classes, np.int64)
+    confusion = np.zeros((num_classes, num_classes), np.int64)
+    latencies = []
+    for img, gt_boxes, gt_cls in samples:
+        t0 = time.perf_counter()
+        boxes, scores, classes = backend.predict(img, conf)
+        latencies.append(time.perf_counter() - t0)
+
+        gt_total += np.bincount(gt_cls, minlength=num_classes)
+        matched = np.zeros(len(gt_boxes), dtype=bool)
+        for box, cls_id in zip(boxes, classes):
+            if len(gt_boxes):
+                ious = box_iou(box, gt_boxes)
+                ious[matched] = 0
+                best = int(ious.argmax())
+                if ious[best] >= iou_thres:
+                    matched[best] = True
+                    confusion[gt_cls[best], cls_id] += 1
+                    if gt_cls[best] == cls_id:
+                        tp[cls_id] += 1
+                        continue
+            fp[cls_id] += 1
+    # 每个 GT 要么被同类别的框命中，要么算漏检（包括框对上但类别错了）
+    fn = gt_total - tp
+    return {"tp": tp, "fp": fp, "fn": fn, "confusion": confusion,
+            "latency_ms": float(np.mean(latencies) * 1000) if latencies else 0.0}
+
+
+def per_class_metrics(stats, names):
+    metrics = {}
+    for i, name in enumerate(names):
+        tp, fp, fn = int(stats["tp"][i]), int(stats["fp"][i]), int(stats["fn"][i])
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        metrics[name] = {"precision": precision, "recall": recall, "f1": f1, "support": tp + fn}
+    return metrics
+
+
+def load_samples(image_paths):
+    samples = []
+    for path in image_paths:
+        label = find_label(path)
+        img = cv2.imread(str(path))
+        if label is None or img is None:
+            continue
+        boxes, classes = read_yolo_labels(label, img.shape[1], img.shape[0])
+        samples.append((img, boxes, classes))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 静态量化")
+    parser.add_argument("--model", default="models/trashcan.onnx", help="FP32 ONNX 模型")
+    parser.add_argument("--output", help="输出路径，默认 <模型名>_int8.onnx")
+    parser.add_argument("--calib-dirs", nargs="+", default=["datasets/train", "images/origin_img"],
+                        help="校准图片目录")
+    parser.add_argument("--calib-count", type=int, default=200, help="校准图片数量")
+    parser.add_argument("--eval-dirs", nargs="+", default=["datasets/valid"],
+                        help="评估用的带标签图片目录")
+    parser.add_argument("--conf", type=float, default=0.25, help="评估时的置信度阈值")
+    parser.add_argument("--all-ops", action="store_true", help="量化所有算子（包括检测头）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fp32_path = Path(args.model)
+    int8_path = Path(args.output) if args.output else fp32_path.with_name(fp32_path.stem + "_int8.onnx")
+
+    calib_paths = list_images(*args.calib_dirs)
+    if not calib_paths:
+        print(f"在 {args.calib_dirs} 中没有找到校准图片")
+        return
+    random.Random(args.seed).shuffle(calib_paths)
+    quantize(fp32_path, int8_path, calib_paths[:args.calib_count], args.all_ops)
+
+    samples = load_samples(list_images(*args.eval_dirs))
+    if not samples:
+        print(f"在 {args.eval_dirs} 中没有找到带标签的图片，跳过精度评估")
+        return
+    names = load_class_names()
+    fp32_stats = evaluate(OnnxBackend(fp32_path), samples, len(names), args.conf)
+    int8_stats = evaluate(OnnxBackend(int8_path), samples, len(names), args.conf)
+    fp32_metrics = per_class_metrics(fp32_stats, names)
+    int8_metrics = per_class_metrics(int8_stats, names)
+
+    print(f"\n评估图片 {len(samples)} 张")
+    print(f"{'类别':<12} {'数量':>6} {'FP32 F1':>9} {'INT8 F1':>9} {'损失':>8} {'INT8 召回':>10}")
+    print("-" * 60)
+    per_class = {}
+    for name in names:
+        a, b = fp32_metrics[name], int8_metrics[name]
+        loss = a["f1"] - b["f1"]
+        per_class[name] = {"fp32": a, "int8": b, "f1_loss": loss}
+        flag = " *" if name in CONFUSABLE else ""
+        print(f"{name:<12} {a['support']:>6} {a['f1']:>9.3f} {b['f1']:>9.3f} {loss:>8.3f} {b['recall']:>10.3f}{flag}")
+
+    # 易混淆类别之间的互相误判
+    idx = [names.index(n) for n in CONFUSABLE if n in names]
+    confusable = {}
+    for label, stats in (("fp32", fp32_stats), ("int8", int8_stats)):
+        confusable[label] = {names[i]: {names[j]: int(stats["confusion"][i, j]) for j in idx} for i in idx}
+    print("\n易混淆类别（行: 真实类别, 列: 预测类别）")
+    for label in ("fp32", "int8"):
+        print(f"  {label}: {json.dumps(confusable[label], ensure_ascii=False)}")
+
+    speedup = fp32_stats["latency_ms"] / int8_stats["latency_ms"] if int8_stats["latency_ms"] else 0.0
+    print(f"\n延迟 FP32 {fp32_stats['latency_ms']:.2f}ms, INT8 {int8_stats['latency_ms']:.2f}ms, "
+          f"加速 {speedup:.2f}x")
+
+    report = {
+        "fp32_model": str(fp32_path),
+        "int8_model": str(int8_path),
+        "calibration_images": min(len(calib_paths), args.calib_count),
+        "eval_images": len(samples),
+        "conf": args.conf,
+        "latency_ms": {"fp32": fp32_stats["latency_ms"], "int8": int8_stats["latency_ms"]},
+        "speedup": speedup,
+        "per_class": per_class,
+        "confusable": confusable,
+    }
+    report_path = int8_path.with_name(int8_path.stem + "_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已保存到 {report_path}")
+
+
+if __name__ == "__main__":
+    main()